@@ -0,0 +1,152 @@
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import numpy as np
+
+FUNCTIONS = {
+    "generate_caption": ("blip", "generate_caption", "generate_caption_batch"),
+    "predict_tags_clip": ("clip", "predict_tags_clip", "predict_tags_clip_batch"),
+    "predict_tags_vit": ("vit", "predict_tags_vit", "predict_tags_vit_batch"),
+    "extract_vit_embedding": ("vit", "extract_vit_embedding", "extract_vit_embedding_batch"),
+}
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux.
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    values = np.array(samples) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "mean_ms": round(float(values.mean()), 2),
+    }
+
+
+def run_function(name: str, iterations: int, batch_sizes: List[int]) -> dict:
+    """Benchmark one function; meant to run in a fresh process."""
+    started = time.perf_counter()
+    from services import model_services
+    import_seconds = time.perf_counter() - started
+
+    from sample_images import synthetic_images
+
+    model, single_name, batch_name = FUNCTIONS[name]
+    single = getattr(model_services, single_name)
+    batch = getattr(model_services, batch_name)
+
+    images = synthetic_images(max(batch_sizes + [1]), size=384)
+
+    started = time.perf_counter()
+    model_services.load_model(model)
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    single(images[0])
+    first_call_seconds = time.perf_counter() - started
+
+    latencies = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        single(images[i % len(images)])
+        latencies.append(time.perf_counter() - started)
+
+    throughput = []
+    for size in batch_sizes:
+        batch_images = images[:size]
+        batch(batch_images, max_batch_size=size)
+        rounds = max(1, iterations // size)
+        started = time.perf_counter()
+        for _ in range(rounds):
+            batch(batch_images, max_batch_size=size)
+        elapsed = time.perf_counter() - started
+        throughput.append({
+            "batch_size": size,
+            "images_per_second": round(rounds * size / elapsed, 2),
+            "ms_per_image": round(elapsed * 1000 / (rounds * size), 2),
+        })
+
+    return {
+        "function": name,
+        "model": model,
+        "backend": model_services.MODEL_BACKENDS[model],
+        "cold": {
+            "import_seconds": round(import_seconds, 3),
+            "load_seconds": round(load_seconds, 3),
+            "first_call_seconds": round(first_call_seconds, 3),
+        },
+        "warm_single": {"iterations": iterations, **percentiles(latencies)},
+        "batched": throughput,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _worker(name, iterations, batch_sizes, queue):
+    try:
+        queue.put(run_function(name, iterations, batch_sizes))
+    except Exception as e:
+        queue.put({"function": name, "error": str(e)})
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark model_services inference")
+    parser.add_argument("--functions", default=",".join(FUNCTIONS))
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--batch-sizes", default="1,4,8,16")
+    parser.add_argument("--output", default="")
+    args = parser.parse_args()
+
+    names = [n for n in args.functions.split(",") if n in FUNCTIONS]
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",") if b.strip()]
+
+    import torch
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "cpu_count": multiprocessing.cpu_count(),
+        "results": [],
+    }
+
+    # Each function runs in its own process so cold-load time and peak RSS
+    # are not polluted by models another function already loaded.
+    context = multiprocessing.get_context("spawn")
+    for name in names:
+        queue = context.Queue()
+        process = context.Process(target=_worker, args=(name, args.iterations, batch_sizes, queue))
+        process.start()
+        result = queue.get()
+        process.join()
+        report["results"].append(result)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from typing import List
+
+import numpy as np
+from PIL import Image
+
+from sample_images import synthetic_images
+from services.model_services import (
+    INFERENCE_BACKENDS,
+    MODEL_NAMES,
+    analyze_image_batch,
+    set_model_backend,
+)
+
+
+def reference_images(directory: str, count: int) -> List[Image.Image]:
+    if not directory:
+        return synthetic_images(count)
+
+    paths = sorted(
+        p for p in glob.glob(os.path.join(directory, "*"))
+        if p.lower().endswith((".jpg", ".jpeg", ".png", ".webp"))
+    )[:count]
+    return [Image.open(p).convert("RGB") for p in paths]
+
+
+def jaccard(a: List[str], b: List[str]) -> float:
+    a_set, b_set = set(a), set(b)
+    if not a_set and not b_set:
+        return 1.0
+    return len(a_set & b_set) / len(a_set | b_set)
+
+
+def compare(baseline: List[dict], candidate: List[dict]) -> dict:
+    pairs = list(zip(baseline, candidate))
+    captions = [b["caption"] == c["caption"] for b, c in pairs if "caption" in b and "caption" in c]
+    clip_tags = [jaccard(b["clip_tags"], c["clip_tags"]) for b, c in pairs if "clip_tags" in b and "clip_tags" in c]
+    vit_tags = [jaccard(b["vit_tags"], c["vit_tags"]) for b, c in pairs if "vit_tags" in b and "vit_tags" in c]
+    cosines = [
+        float(np.dot(b["embedding"], c["embedding"]))
+        for b, c in pairs
+        if "embedding" in b and "embedding" in c
+    ]
+    return {
+        "caption_exact_match": float(np.mean(captions)) if captions else None,
+        "clip_tag_jaccard_mean": float(np.mean(clip_tags)) if clip_tags else None,
+        "vit_tag_jaccard_mean": float(np.mean(vit_tags)) if vit_tags else None,
+        "embedding_cosine_mean": float(np.mean(cosines)) if cosines else None,
+        "embedding_cosine_min": float(np.min(cosines)) if cosines else None,
+    }
+
+
+def gate(model: str, metrics: dict, args) -> dict:
+    """Checks for the model under test; the other models stay on eager."""
+    checks = {
+        "blip": {"caption_exact_match": args.min_caption_match},
+        "clip": {"clip_tag_jaccard_mean": args.min_tag_jaccard},
+        "vit": {
+            "vit_tag_jaccard_mean": args.min_tag_jaccard,
+            "embedding_cosine_min": args.min_embedding_cosine,
+        },
+    }[model]
+    return {
+        metric: metrics[metric] is not None and metrics[metric] >= threshold
+        for metric, threshold in checks.items()
+    }
+
+
+def timed_analysis(images: List[Image.Image]):
+    started = time.perf_counter()
+    results = analyze_image_batch(images)
+    return results, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare quantized/bf16 model backends against fp32 eager"
+    )
+    parser.add_argument(
+        "--images",
+        default="",
+        help="Directory of real reference photos; required for the accuracy gate. "
+        "Without it synthetic images are used and only speed is meaningful.",
+    )
+    parser.add_argument("--count", type=int, default=16)
+    parser.add_argument("--backends", default="int8,bf16")
+    parser.add_argument("--models", default=",".join(MODEL_NAMES))
+    parser.add_argument("--min-embedding-cosine", type=float, default=0.98)
+    parser.add_argument("--min-caption-match", type=float, default=0.75)
+    parser.add_argument("--min-tag-jaccard", type=float, default=0.8)
+    parser.add_argument("--output", default="")
+    args = parser.parse_args()
+
+    images = reference_images(args.images, args.count)
+    gated = bool(args.images)
+    if not gated:
+        print("No --images directory given: synthetic images cannot measure caption "
+              "or tag accuracy, so the accuracy gate is skipped.", file=sys.stderr)
+    elif not images:
+        parser.error(f"No images found in {args.images}")
+    models = [m for m in args.models.split(",") if m in MODEL_NAMES]
+    backends = [b for b in args.backends.split(",") if b in INFERENCE_BACKENDS and b != "eager"]
+
+    for model in MODEL_NAMES:
+        set_model_backend(model, "eager")
+    analyze_image_batch(images[:1])
+    baseline, baseline_seconds = timed_analysis(images)
+
+    report = {
+        "images": len(images),
+        "baseline_seconds": round(baseline_seconds, 3),
+        "accuracy_gated": gated,
+        "results": [],
+    }
+    failed = False
+
+    for backend in backends:
+        for model in models:
+            set_model_backend(model, backend)
+            analyze_image_batch(images[:1])
+            candidate, seconds = timed_analysis(images)
+            set_model_backend(model, "eager")
+
+            metrics = compare(baseline, candidate)
+            checks = gate(model, metrics, args)
+            passed = all(checks.values()) if gated else None
+            failed = failed or passed is False
+
+            report["results"].append({
+                "model": model,
+                "backend": backend,
+                "seconds": round(seconds, 3),
+                "speedup": round(baseline_seconds / seconds, 2) if seconds else None,
+                "passed": passed,
+                "checks": checks,
+                **metrics,
+            })
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,194 @@
 import os
+import threading
+import time
 from dotenv import load_dotenv
 import motor.motor_asyncio
+from pymongo import monitoring
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "deep_gallary")
 
-client = motor.motor_asyncio.AsyncIOMotorClient(DATABASE_URL)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_MAX_CONNECTING = int(os.getenv("MONGO_MAX_CONNECTING", "2"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "10000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "0")) or None
+# zstd needs the zstandard package and snappy needs python-snappy; zlib is builtin.
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
 
-database = client.deep_gallary
 
-admin_collection = database.admin
-image_collection = database.image
-project_collection = database.project
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Connection pool counters, aggregated across servers."""
 
-# def get_database():
-#     return database
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
 
-# async def close_mongo_connection():
-#     client.close()
+    def reset(self):
+        with self._lock:
+            self.pools = 0
+            self.open_connections = 0
+            self.checked_out = 0
+            self.max_checked_out = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.connections_created = 0
+            self.connections_closed = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def pool_created(self, event):
+        with self._lock:
+            self.pools += 1
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        with self._lock:
+            self.pools -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+            self.open_connections += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_closed += 1
+            self.open_connections -= 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+            self._record_wait(event)
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+            self._record_wait(event)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def _record_wait(self, event):
+        wait = getattr(event, "duration", 0.0) or 0.0
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "pools": self.pools,
+                "max_pool_size": MONGO_MAX_POOL_SIZE,
+                "open_connections": self.open_connections,
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "connections_created": self.connections_created,
+                "connections_closed": self.connections_closed,
+                "avg_wait_ms": self.total_wait / self.checkouts * 1000 if self.checkouts else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+
+pool_stats = PoolStats()
+
+_client = None
+_client_lock = threading.Lock()
+_client_started = 0.0
+
+
+def get_client() -> motor.motor_asyncio.AsyncIOMotorClient:
+    """Return the shared client, creating it with the configured pool on first use."""
+    global _client, _client_started
+    with _client_lock:
+        if _client is None:
+            options = {
+                "maxPoolSize": MONGO_MAX_POOL_SIZE,
+                "minPoolSize": MONGO_MIN_POOL_SIZE,
+                "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+                "maxConnecting": MONGO_MAX_CONNECTING,
+                "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+                "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+                "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+                "readPreference": MONGO_READ_PREFERENCE,
+                "event_listeners": [pool_stats],
+            }
+            if MONGO_COMPRESSORS:
+                options["compressors"] = MONGO_COMPRESSORS
+            _client = motor.motor_asyncio.AsyncIOMotorClient(DATABASE_URL, **options)
+            _client_started = time.monotonic()
+        return _client
+
+
+def get_database():
+    return get_client()[DATABASE_NAME]
+
+
+def connect_to_mongo():
+    get_client()
+
+
+def close_mongo_connection():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def pool_status() -> dict:
+    return {
+        "connected": _client is not None,
+        "uptime_seconds": time.monotonic() - _client_started if _client is not None else 0.0,
+        "compressors": MONGO_COMPRESSORS.split(",") if MONGO_COMPRESSORS else [],
+        "read_preference": MONGO_READ_PREFERENCE,
+        **pool_stats.snapshot(),
+    }
+
+
+class _LazyDatabase:
+    """Module-level stand-in so `from database import ...` works before the client exists."""
+
+    def __getattr__(self, name):
+        return getattr(get_database(), name)
+
+    def __getitem__(self, name):
+        return get_database()[name]
+
+
+class _LazyCollection:
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, name):
+        return getattr(get_database()[self._name], name)
+
+
+database = _LazyDatabase()
+
+admin_collection = _LazyCollection("admin")
+image_collection = _LazyCollection("image")
+project_collection = _LazyCollection("project")
+inference_cache_collection = _LazyCollection("inference_cache")
+counters_collection = _LazyCollection("counters")
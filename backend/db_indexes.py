@@ -0,0 +1,177 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from database import database
+
+ENSURE_INDEXES_ON_STARTUP = os.getenv("ENSURE_INDEXES_ON_STARTUP", "true").lower() == "true"
+# Refuse to start while a unique index is missing, instead of only logging it.
+REQUIRE_UNIQUE_INDEXES = os.getenv("REQUIRE_UNIQUE_INDEXES", "false").lower() == "true"
+
+# Every index the application relies on, by collection. The _id index is
+# implicit. Compound indexes end in _id so keyset pagination stays indexed.
+INDEXES = {
+    "admin": [
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("admin_id", ASCENDING)], name="admin_id_unique", unique=True),
+    ],
+    "image": [
+        IndexModel([("project_id", ASCENDING), ("_id", ASCENDING)], name="project_id_id"),
+        IndexModel([("admin_id", ASCENDING), ("_id", ASCENDING)], name="admin_id_id"),
+        IndexModel([("metadata.content_hash", ASCENDING)], name="content_hash"),
+        IndexModel([("metadata.filename", ASCENDING)], name="filename"),
+        IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+        IndexModel([("inference_job_id", ASCENDING)], name="inference_job_id", sparse=True),
+        IndexModel(
+            [("inference_status", ASCENDING), ("inference_claimed_at", ASCENDING)],
+            name="inference_status_claimed_at",
+        ),
+    ],
+    "project": [
+        IndexModel([("admin_id", ASCENDING), ("_id", ASCENDING)], name="admin_id_id"),
+    ],
+}
+
+
+async def ensure_indexes() -> dict:
+    """Create any missing registry indexes; failures are reported, not raised."""
+    report = {}
+    for collection_name, indexes in INDEXES.items():
+        collection = database[collection_name]
+        created, failed, unique_failed = [], {}, []
+        for index in indexes:
+            name = index.document["name"]
+            try:
+                await collection.create_indexes([index])
+                created.append(name)
+            except OperationFailure as e:
+                # e.g. duplicate usernames block a unique index
+                failed[name] = str(e)
+                if index.document.get("unique"):
+                    unique_failed.append(name)
+        report[collection_name] = {
+            "ensured": created,
+            "failed": failed,
+            "unique_failed": unique_failed,
+        }
+    return report
+
+
+async def bootstrap_indexes() -> None:
+    """Ensure indexes at startup and report any that could not be built.
+
+    Unique indexes usually fail on duplicates left by older racy writes;
+    'python db_indexes.py dedupe --apply' fixes those. With
+    REQUIRE_UNIQUE_INDEXES the app refuses to start until then.
+    """
+    report = await ensure_indexes()
+    unique_failed = []
+    for collection_name, result in report.items():
+        for name, error in result["failed"].items():
+            print(f"Index {collection_name}.{name} could not be built: {error}", file=sys.stderr)
+        unique_failed += [f"{collection_name}.{name}" for name in result["unique_failed"]]
+
+    if unique_failed:
+        message = (
+            "Unique indexes could not be built; run 'python db_indexes.py dedupe' "
+            f"to inspect and fix the duplicates: {', '.join(unique_failed)}"
+        )
+        if REQUIRE_UNIQUE_INDEXES:
+            raise RuntimeError(message)
+        print(message, file=sys.stderr)
+
+
+async def _duplicate_groups(collection, field: str) -> list:
+    pipeline = [
+        {"$sort": {"_id": 1}},
+        {"$group": {"_id": f"${field}", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}, "_id": {"$ne": None}}},
+    ]
+    return [group async for group in collection.aggregate(pipeline)]
+
+
+async def dedupe_admins(apply: bool = False) -> dict:
+    """Resolve duplicates that block the unique admin indexes.
+
+    The oldest admin in each group keeps its value. Later duplicates get a
+    fresh admin_id from the sequence and a username suffixed with that id.
+    Duplicate emails belong to people and are only reported.
+    """
+    from services.sequences import admin_id_sequence
+
+    admins = database["admin"]
+    report = {"applied": apply, "admin_id": [], "username": [], "email": []}
+
+    for group in await _duplicate_groups(admins, "admin_id"):
+        for oid in group["ids"][1:]:
+            new_id = await admin_id_sequence.next_id() if apply else None
+            if apply:
+                await admins.update_one({"_id": oid}, {"$set": {"admin_id": new_id}})
+            report["admin_id"].append({"_id": oid, "old": group["_id"], "new": new_id})
+
+    for group in await _duplicate_groups(admins, "username"):
+        for oid in group["ids"][1:]:
+            doc = await admins.find_one({"_id": oid}, {"admin_id": 1})
+            suffix = f"_{doc['admin_id']}"
+            new_username = f"{group['_id'][:30 - len(suffix)]}{suffix}"
+            while await admins.find_one({"username": new_username}, {"_id": 1}):
+                suffix += "_"
+                new_username = f"{group['_id'][:30 - len(suffix)]}{suffix}"
+            if apply:
+                await admins.update_one({"_id": oid}, {"$set": {"username": new_username}})
+            report["username"].append({"_id": oid, "old": group["_id"], "new": new_username})
+
+    for group in await _duplicate_groups(admins, "email"):
+        report["email"].append({"email": group["_id"], "_ids": group["ids"]})
+
+    if apply:
+        report["indexes"] = await ensure_indexes()
+    return report
+
+
+async def index_report() -> dict:
+    report = {}
+    for collection_name, indexes in INDEXES.items():
+        collection = database[collection_name]
+        expected = {index.document["name"] for index in indexes}
+        existing = set(await collection.index_information())
+
+        usage = {}
+        try:
+            async for stats in collection.aggregate([{"$indexStats": {}}]):
+                usage[stats["name"]] = stats["accesses"]["ops"]
+        except OperationFailure:
+            pass
+
+        report[collection_name] = {
+            "missing": sorted(expected - existing),
+            "unregistered": sorted(existing - expected - {"_id_"}),
+            "unused": sorted(name for name in existing & expected if usage.get(name) == 0),
+            "ops": usage,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage MongoDB indexes")
+    parser.add_argument("command", choices=["apply", "report", "dedupe"], nargs="?", default="report")
+    parser.add_argument("--apply", action="store_true", help="With dedupe, write the fixes instead of listing them")
+    args = parser.parse_args()
+
+    if args.command == "dedupe":
+        result = asyncio.run(dedupe_admins(apply=args.apply))
+    elif args.command == "apply":
+        result = asyncio.run(ensure_indexes())
+    else:
+        result = asyncio.run(index_report())
+    print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
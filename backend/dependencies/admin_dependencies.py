@@ -4,6 +4,7 @@ from typing import Optional
 import os
 import uuid
 from pathlib import Path
+from services.uploads import save_upload
 
 ADMIN_PROFILE_DIR = "uploads/profiles"
 ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png", "gif", "webp"}
@@ -59,13 +60,7 @@ async def save_admin_profile_image(file: UploadFile) -> str:
     unique_filename = f"{uuid.uuid4()}.{extension}"
     file_path = os.path.join(ADMIN_PROFILE_DIR, unique_filename)
 
-    contents = await file.read()
-
-    if len(contents) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail="File too large. Max 5MB")
-
-    with open(file_path, "wb") as f:
-        f.write(contents)
+    await save_upload(file, file_path, max_size=MAX_FILE_SIZE)
 
     return file_path
 
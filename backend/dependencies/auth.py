@@ -1,26 +1,29 @@
 import os
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import Annotated, Optional
+from typing import Annotated, Optional, Tuple
 
 import jwt
 from jwt.exceptions import InvalidTokenError
 from dotenv import load_dotenv
-from pwdlib import PasswordHash
 from pydantic import BaseModel, Field
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 
 from database import admin_collection
+from services.password_hashing import get_password_hash, verify_and_update_password, verify_password
 
 load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY", "fallback_secret_key")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_DAYS = int(os.getenv("ACCESS_TOKEN_EXPIRE_DAYS", "7"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
-password_hash = PasswordHash.recommended()
 
 
 class Token(BaseModel):
@@ -53,14 +56,6 @@ class PasswordChange(BaseModel):
     new_password: str
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return password_hash.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    return password_hash.hash(password)
-
-
 async def get_admin(username: str) -> Optional[AdminInDB]:
     admin_dict = await admin_collection.find_one({"username": username})
     if not admin_dict:
@@ -69,12 +64,53 @@ async def get_admin(username: str) -> Optional[AdminInDB]:
     return AdminInDB(**admin_dict)
 
 
+# Authenticated admins by username, so protected requests skip the lookup.
+# Entries expire after PRINCIPAL_CACHE_TTL and are dropped explicitly when
+# the admin's password, profile or existence changes.
+_principal_cache: "OrderedDict[str, tuple[float, AdminInDB]]" = OrderedDict()
+
+
+def cache_principal(admin: AdminInDB):
+    if PRINCIPAL_CACHE_TTL <= 0:
+        return
+    _principal_cache[admin.username] = (time.monotonic() + PRINCIPAL_CACHE_TTL, admin)
+    _principal_cache.move_to_end(admin.username)
+    while len(_principal_cache) > PRINCIPAL_CACHE_SIZE:
+        _principal_cache.popitem(last=False)
+
+
+def invalidate_principal(*usernames: Optional[str]):
+    for username in usernames:
+        if username:
+            _principal_cache.pop(username, None)
+
+
+async def get_cached_admin(username: str) -> Optional[AdminInDB]:
+    entry = _principal_cache.get(username)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+    _principal_cache.pop(username, None)
+
+    admin = await get_admin(username)
+    if admin is not None:
+        cache_principal(admin)
+    return admin
+
+
 async def authenticate_admin(username: str, password: str):
     admin = await get_admin(username)
     if not admin:
         return False
-    if not verify_password(password, admin.hashed_password):
+    valid, updated_hash = await verify_and_update_password(password, admin.hashed_password)
+    if not valid:
         return False
+    if updated_hash:
+        # Hashing parameters changed since this password was stored.
+        await admin_collection.update_one(
+            {"admin_id": admin.admin_id},
+            {"$set": {"hashed_password": updated_hash}},
+        )
+        admin.hashed_password = updated_hash
     return admin
 
 
@@ -87,28 +123,54 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-async def get_current_admin(
-    token: Annotated[str, Depends(oauth2_scheme)]
-) -> AdminInDB:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _decode_token(token: str) -> Tuple[str, Optional[str]]:
+    """Return the username and, for tokens that carry it, the admin's _id."""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username = payload.get("sub")
-        if username is None:
-            raise credentials_exception
     except InvalidTokenError:
-        raise credentials_exception
+        raise _credentials_exception()
 
-    admin = await get_admin(username)
+    username = payload.get("sub")
+    admin_oid = payload.get("aid")
+    if username is None or not isinstance(admin_oid, (str, type(None))):
+        raise _credentials_exception()
+    return username, admin_oid
+
+
+async def get_current_admin(
+    token: Annotated[str, Depends(oauth2_scheme)]
+) -> AdminInDB:
+    credentials_exception = _credentials_exception()
+    username, admin_oid = _decode_token(token)
+
+    admin = await get_cached_admin(username)
     if admin is None:
         raise credentials_exception
+    # A username freed by a rename or delete may since belong to another admin.
+    if admin_oid is not None and admin.id != admin_oid:
+        raise credentials_exception
     return admin
 
 
+async def get_current_admin_id(
+    token: Annotated[str, Depends(oauth2_scheme)]
+) -> str:
+    """The authenticated admin's _id, for ownership checks that only need the id.
+
+    Resolved through the principal cache like get_current_admin, so a
+    deleted or renamed admin loses access within PRINCIPAL_CACHE_TTL.
+    """
+    return (await get_current_admin(token)).id
+
+
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
@@ -121,8 +183,9 @@ async def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    cache_principal(admin)
     access_token = create_access_token(
-        data={"sub": admin.username},
+        data={"sub": admin.username, "aid": admin.id},
         expires_delta=timedelta(days=ACCESS_TOKEN_EXPIRE_DAYS),
     )
 
@@ -141,13 +204,19 @@ async def change_own_password(
     password_data: PasswordChange,
     current_admin: Annotated[AdminInDB, Depends(get_current_admin)],
 ):
-    if not verify_password(
+    # The cached principal's hash may be stale if the password was changed
+    # through another worker, so check against the stored one.
+    admin = await get_admin(current_admin.username)
+    if admin is None:
+        raise HTTPException(status_code=404, detail="Admin not found")
+
+    if not await verify_password(
         password_data.current_password,
-        current_admin.hashed_password,
+        admin.hashed_password,
     ):
         raise HTTPException(status_code=400, detail="wrong password")
 
-    new_hashed = get_password_hash(password_data.new_password)
+    new_hashed = await get_password_hash(password_data.new_password)
 
     await admin_collection.update_one(
         {"username": current_admin.username},
@@ -158,5 +227,6 @@ async def change_own_password(
             }
         },
     )
+    invalidate_principal(current_admin.username)
 
     return {"message": "Admin updated successfully"}
@@ -2,7 +2,7 @@ from fastapi import HTTPException
 from database import image_collection, project_collection, admin_collection
 from bson import ObjectId
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, Iterable, List, Optional
 
 class AdminInfo(BaseModel):
     username: str
@@ -50,6 +50,58 @@ async def get_admin_info_by_id(admin_id: str) -> Optional[AdminInfo]:
     except:
         return None
 
+def _object_ids(ids: Iterable) -> List[ObjectId]:
+    return [ObjectId(str(i)) for i in set(ids) if i and ObjectId.is_valid(str(i))]
+
+async def get_admin_infos_by_ids(admin_ids: Iterable[str]) -> Dict[str, AdminInfo]:
+    infos = {}
+    cursor = admin_collection.find(
+        {"_id": {"$in": _object_ids(admin_ids)}},
+        {"username": 1, "name": 1, "email": 1, "photo": 1},
+    )
+    async for admin in cursor:
+        try:
+            infos[str(admin["_id"])] = AdminInfo(
+                username=admin["username"],
+                name=admin["name"],
+                email=admin["email"],
+                photo=admin.get("photo")
+            )
+        except Exception:
+            continue
+    return infos
+
+async def get_project_infos_by_ids(project_ids: Iterable[str]) -> Dict[str, ProjectInfo]:
+    infos = {}
+    cursor = project_collection.find(
+        {"_id": {"$in": _object_ids(project_ids)}},
+        {"project_name": 1},
+    )
+    async for project in cursor:
+        try:
+            infos[str(project["_id"])] = ProjectInfo(
+                id=str(project["_id"]),
+                project_name=project["project_name"]
+            )
+        except Exception:
+            continue
+    return infos
+
+async def attach_image_relations(image_docs: List[dict]) -> List[dict]:
+    """Resolve admin and project info for a page of images with one query each."""
+    admins = await get_admin_infos_by_ids(doc.get("admin_id") for doc in image_docs)
+    projects = await get_project_infos_by_ids(doc.get("project_id") for doc in image_docs)
+
+    for doc in image_docs:
+        admin_info = admins.get(str(doc.get("admin_id")))
+        project_info = projects.get(str(doc.get("project_id")))
+        if admin_info:
+            doc["admin"] = admin_info
+        if project_info:
+            doc["project"] = project_info
+
+    return image_docs
+
 async def get_image_with_relations(id: str):
     image_doc = await get_image_by_id_or_404(id)
 
@@ -0,0 +1,61 @@
+from bson import ObjectId
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from typing import List, Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class PageParams(BaseModel):
+    cursor: Optional[str] = None
+    limit: int = DEFAULT_PAGE_SIZE
+
+def get_page_params(cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> PageParams:
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Limit must be between 1 and {MAX_PAGE_SIZE}"
+        )
+    if cursor and not ObjectId.is_valid(cursor):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return PageParams(cursor=cursor, limit=limit)
+
+def get_offset_page_params(cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> PageParams:
+    """Page params for ranked results, where the cursor is an opaque offset."""
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Limit must be between 1 and {MAX_PAGE_SIZE}"
+        )
+    if cursor and (not cursor.isdigit()):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return PageParams(cursor=cursor, limit=limit)
+
+async def fetch_page(
+    collection,
+    query: dict,
+    page: PageParams,
+    projection: Optional[dict] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """Keyset pagination on _id; returns the page and the cursor for the next one."""
+    query = dict(query)
+    if page.cursor:
+        query["_id"] = {"$gt": ObjectId(page.cursor)}
+
+    cursor = collection.find(query, projection).sort("_id", 1).limit(page.limit + 1)
+    docs = await cursor.to_list(length=page.limit + 1)
+
+    next_cursor = None
+    if len(docs) > page.limit:
+        docs = docs[:page.limit]
+        next_cursor = str(docs[-1]["_id"])
+
+    return docs, next_cursor
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+def image_projection(include_embeddings: bool) -> Optional[dict]:
+    return None if include_embeddings else {"embeddings": 0}
@@ -2,7 +2,7 @@ from fastapi import HTTPException
 from database import project_collection, admin_collection
 from bson import ObjectId
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, Iterable, List, Optional
 
 class AdminInfo(BaseModel):
     username: str
@@ -34,6 +34,33 @@ async def get_admin_info_by_id(admin_id: str) -> Optional[AdminInfo]:
     except:
         return None
 
+async def get_admin_infos_by_ids(admin_ids: Iterable[str]) -> Dict[str, AdminInfo]:
+    object_ids = [ObjectId(str(i)) for i in set(admin_ids) if i and ObjectId.is_valid(str(i))]
+    infos = {}
+    cursor = admin_collection.find(
+        {"_id": {"$in": object_ids}},
+        {"username": 1, "name": 1, "email": 1, "photo": 1},
+    )
+    async for admin in cursor:
+        try:
+            infos[str(admin["_id"])] = AdminInfo(
+                username=admin["username"],
+                name=admin["name"],
+                email=admin["email"],
+                photo=admin.get("photo")
+            )
+        except Exception:
+            continue
+    return infos
+
+async def attach_project_admins(project_docs: List[dict]) -> List[dict]:
+    admins = await get_admin_infos_by_ids(doc.get("admin_id") for doc in project_docs)
+    for doc in project_docs:
+        admin_info = admins.get(str(doc.get("admin_id")))
+        if admin_info:
+            doc["admin"] = admin_info
+    return project_docs
+
 async def get_project_with_admin(id: str):
     project_doc = await get_project_by_id_or_404(id)
     admin_info = await get_admin_info_by_id(project_doc["admin_id"])
@@ -0,0 +1,138 @@
+import argparse
+import gc
+import os
+import signal
+import sys
+import threading
+import time
+from multiprocessing.connection import Listener
+
+import torch
+
+from services import model_services
+from services.inference_client import (
+    INFERENCE_SERVER_AUTHKEY,
+    INFERENCE_SERVER_SOCKET,
+    decode_image,
+)
+
+DEFAULT_SOCKET = "/tmp/deep_gallary_inference.sock"
+# Model calls each worker runs at once; status requests are never queued behind them.
+INFERENCE_SERVER_CONCURRENCY = int(os.getenv("INFERENCE_SERVER_CONCURRENCY", "1"))
+
+_compute = threading.BoundedSemaphore(max(1, INFERENCE_SERVER_CONCURRENCY))
+
+
+def handle(message: dict) -> dict:
+    op = message.get("op")
+    if op == "status":
+        return {"ok": True, "result": {
+            "pid": os.getpid(),
+            "ready": model_services.models_ready(),
+            "models": model_services.model_status,
+        }}
+
+    if op == "analyze":
+        images = [decode_image(payload) for payload in message["images"]]
+        with _compute:
+            result = model_services.analyze_image_batch(images, **message.get("kwargs", {}))
+        return {"ok": True, "result": result}
+
+    return {"ok": False, "error": f"Unknown op: {op}"}
+
+
+def serve_connection(conn) -> None:
+    with conn:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            try:
+                response = handle(message)
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            try:
+                conn.send(response)
+            except OSError:
+                break
+
+
+def serve(listener: Listener, num_threads: int) -> None:
+    # Models are warmed here rather than in the parent: running torch
+    # kernels before fork can leave the child's thread pool unusable.
+    torch.set_num_threads(num_threads)
+    model_services.preload_models()
+
+    # Clients keep their connections open, so each one gets its own thread;
+    # otherwise a worker would be tied up by a single idle client.
+    while True:
+        try:
+            conn = listener.accept()
+        except Exception:
+            continue
+        threading.Thread(target=serve_connection, args=(conn,), daemon=True).start()
+
+
+def spawn(listener: Listener, num_threads: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        try:
+            serve(listener, num_threads)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared-weight model server for the API workers")
+    parser.add_argument("--socket", default=INFERENCE_SERVER_SOCKET or DEFAULT_SOCKET)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("INFERENCE_SERVER_WORKERS", "2")))
+    args = parser.parse_args()
+
+    if not INFERENCE_SERVER_AUTHKEY:
+        # The socket carries pickles, so an unauthenticated peer could run code.
+        parser.error("INFERENCE_SERVER_AUTHKEY must be set")
+
+    # Load weights once in the parent; forked workers share the pages
+    # copy-on-write because inference never writes to them. Loading runs
+    # single-threaded so the OpenMP pool is not started before fork.
+    num_threads = torch.get_num_threads()
+    torch.set_num_threads(1)
+    model_services.load_models(model_services.PRELOAD_MODELS)
+    gc.collect()
+    gc.freeze()
+
+    if os.path.exists(args.socket):
+        os.remove(args.socket)
+    listener = Listener(args.socket, family="AF_UNIX", authkey=INFERENCE_SERVER_AUTHKEY)
+
+    children = {spawn(listener, num_threads) for _ in range(max(1, args.workers))}
+    print(f"Inference server listening on {args.socket} with {len(children)} workers")
+
+    def shutdown(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        listener.close()
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    while True:
+        pid, _ = os.wait()
+        if pid in children:
+            children.discard(pid)
+            time.sleep(1)
+            children.add(spawn(listener, num_threads))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,49 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from routers.admin import router as admin_router
 from routers.image import router as image_router
 from routers.project import router as project_router
+from routers.jobs import router as jobs_router
+from routers.health import router as health_router
 from dependencies.auth import router as auth_router
+from dependencies.pagination import NEXT_CURSOR_HEADER
+from database import close_mongo_connection, connect_to_mongo
+from db_indexes import ENSURE_INDEXES_ON_STARTUP, bootstrap_indexes
+from services.image_inference import run_inference_sweeper
+from services.inference_jobs import inference_queue, preview_queue
+from services.inference_client import remote_enabled
+from services.model_services import preload_models
+from services.password_hashing import password_pool
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    connect_to_mongo()
+    if ENSURE_INDEXES_ON_STARTUP:
+        await bootstrap_indexes()
+
+    # Models load in the background so the process is live immediately;
+    # /health/ready reports 503 until they are warm.
+    preload_task = None
+    if not remote_enabled():
+        preload_task = asyncio.create_task(run_in_threadpool(preload_models))
+    # Picks up images left pending by a restart and retries failed ones.
+    sweeper_task = asyncio.create_task(run_inference_sweeper())
+    yield
+    if preload_task:
+        preload_task.cancel()
+    sweeper_task.cancel()
+    inference_queue.shutdown()
+    preview_queue.shutdown()
+    password_pool.shutdown()
+    close_mongo_connection()
+
+app = FastAPI(lifespan=lifespan)
 
 origins = ["http://localhost:3000", "http://localhost:5173"]
 app.add_middleware(
@@ -17,6 +52,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -30,3 +66,5 @@ app.include_router(auth_router)
 app.include_router(admin_router)
 app.include_router(image_router)
 app.include_router(project_router)
+app.include_router(jobs_router)
+app.include_router(health_router)
@@ -0,0 +1,52 @@
+import argparse
+import asyncio
+
+from pymongo import UpdateOne
+
+from database import image_collection
+from services.embedding_codec import DTYPE_CODES, EMBEDDING_STORAGE_DTYPE, encode_embedding
+
+
+async def migrate(dtype: str, batch_size: int, dry_run: bool) -> int:
+    """Rewrite array-valued embeddings as packed binary."""
+    migrated = 0
+    operations = []
+
+    cursor = image_collection.find(
+        {"embeddings": {"$type": "array"}},
+        {"embeddings": 1},
+    )
+    async for doc in cursor:
+        operations.append(UpdateOne(
+            {"_id": doc["_id"]},
+            {"$set": {"embeddings": encode_embedding(doc["embeddings"], dtype)}}
+        ))
+
+        if len(operations) >= batch_size:
+            if not dry_run:
+                await image_collection.bulk_write(operations, ordered=False)
+            migrated += len(operations)
+            operations = []
+
+    if operations:
+        if not dry_run:
+            await image_collection.bulk_write(operations, ordered=False)
+        migrated += len(operations)
+
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert stored image embeddings to binary")
+    parser.add_argument("--dtype", choices=sorted(DTYPE_CODES), default=EMBEDDING_STORAGE_DTYPE)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    count = asyncio.run(migrate(args.dtype, args.batch_size, args.dry_run))
+    action = "Would migrate" if args.dry_run else "Migrated"
+    print(f"{action} {count} embeddings to {args.dtype}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form, Response
 from pydantic import BaseModel, Field, ValidationError, field_validator
 from typing import Annotated, Optional
 import re
@@ -11,7 +11,10 @@ from dependencies.admin_dependencies import (
     save_admin_profile_image,
     delete_admin_profile_image
 )
-from dependencies.auth import get_password_hash, verify_password
+from dependencies.auth import invalidate_principal
+from services.password_hashing import get_password_hash, verify_password
+from dependencies.pagination import PageParams, fetch_page, get_page_params, set_next_cursor
+from services.sequences import admin_id_sequence
 
 router = APIRouter()
 
@@ -121,17 +124,23 @@ class AdminInDB(BaseModel):
 
 @router.get("/admins")
 async def get_admin(
+    response: Response,
     username: Optional[str] = None,
-    email: Optional[str] = None
+    email: Optional[str] = None,
+    page: PageParams = Depends(get_page_params)
 ):
     admin_doc = await get_admin_by_field_or_404(username, email)
 
     if admin_doc:
         return [AdminPublic(**admin_doc)]
 
+    documents, next_cursor = await fetch_page(
+        admin_collection, {}, page, {"hashed_password": 0}
+    )
+    set_next_cursor(response, next_cursor)
+
     admins = []
-    cursor = admin_collection.find({})
-    async for document in cursor:
+    for document in documents:
         document["_id"] = str(document["_id"])
         admins.append(AdminPublic(**document))
     return admins
@@ -172,8 +181,7 @@ async def post_admin(
     await verify_unique_username(admin_data.username)
     await verify_unique_email(admin_data.email)
 
-    last_admin = await admin_collection.find_one(sort=[("admin_id", -1)])
-    new_admin_id = last_admin["admin_id"] + 1 if last_admin else 1
+    new_admin_id = await admin_id_sequence.next_id()
 
     photo_path = None
     if photo:
@@ -181,7 +189,7 @@ async def post_admin(
 
     document = admin_data.model_dump()
     document["admin_id"] = new_admin_id
-    document["hashed_password"] = get_password_hash(document.pop("password"))
+    document["hashed_password"] = await get_password_hash(document.pop("password"))
     document["photo"] = photo_path
     document["created_at"] = datetime.utcnow()
     document["updated_at"] = datetime.utcnow()
@@ -252,6 +260,7 @@ async def patch_admin(
         {"admin_id": admin_doc["admin_id"]},
         {"$set": updated_data}
     )
+    invalidate_principal(admin_doc["username"], updated_data.get("username"))
 
     document = await admin_collection.find_one({"admin_id": admin_doc["admin_id"]})
     if document:
@@ -270,11 +279,12 @@ async def delete_admin(
     if not username and not email:
         raise HTTPException(status_code=400, detail="Either username or email must be provided")
 
-    if not verify_password(password, admin_doc["hashed_password"]):
+    if not await verify_password(password, admin_doc["hashed_password"]):
         raise HTTPException(status_code=401, detail="Incorrect password")
 
     if admin_doc.get("photo"):
         delete_admin_profile_image(admin_doc["photo"])
 
     await admin_collection.delete_one({"admin_id": admin_doc["admin_id"]})
+    invalidate_principal(admin_doc["username"])
     return {"message": "Admin deleted successfully"}
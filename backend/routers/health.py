@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, Response
+from fastapi.concurrency import run_in_threadpool
+from database import pool_status
+from db_indexes import index_report
+from dependencies.auth import get_current_admin
+from services.inference_cache import inference_cache
+from services.inference_client import remote_enabled, server_status
+from services.inference_jobs import inference_queue, preview_queue
+from services.password_hashing import password_pool
+from services.micro_batcher import preview_batcher, upload_batchers
+from services.model_services import PRELOAD_MODELS, model_status, models_ready
+
+router = APIRouter()
+
+@router.get("/health/inference")
+async def get_inference_health():
+    return {
+        "workers": inference_queue.workers,
+        "preview_workers": preview_queue.workers,
+        "pending_jobs": inference_queue.pending_count(),
+        "preview_batcher": preview_batcher.metrics(),
+        "upload_batchers": {
+            f"caption={caption},tags={tags}": batcher.metrics()
+            for (caption, tags), batcher in upload_batchers.items()
+            if batcher.batches
+        },
+        "cache": inference_cache.metrics(),
+    }
+
+
+@router.get("/health/ready")
+async def get_readiness(response: Response):
+    if remote_enabled():
+        status = await run_in_threadpool(server_status)
+        ready = bool(status and status["ready"])
+        models = status["models"] if status else {}
+    else:
+        ready = models_ready()
+        models = model_status
+
+    if not ready:
+        response.status_code = 503
+    return {
+        "ready": ready,
+        "remote": remote_enabled(),
+        "required_models": PRELOAD_MODELS,
+        "models": models,
+    }
+
+
+@router.get("/health/auth")
+async def get_auth_health():
+    return password_pool.metrics()
+
+
+@router.get("/health/db")
+async def get_db_health():
+    return pool_status()
+
+
+@router.get("/health/indexes", dependencies=[Depends(get_current_admin)])
+async def get_index_health():
+    return await index_report()
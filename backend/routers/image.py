@@ -1,39 +1,65 @@
 from bson import ObjectId
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import RedirectResponse
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
 from database import image_collection, project_collection
-from dependencies.auth import get_current_admin, AdminInDB
+from dependencies.auth import get_current_admin, get_current_admin_id, AdminInDB
 from dependencies.image_dependencies import (
     get_image_by_id_or_404,
     get_admin_info_by_id,
     get_project_info_by_id,
     get_image_with_relations,
+    attach_image_relations,
     AdminInfo,
     ProjectInfo
 )
-from services.model_services import (
-    generate_caption,
-    predict_tags,
-    extract_vit_embedding,
+from dependencies.pagination import (
+    PageParams,
+    fetch_page,
+    get_offset_page_params,
+    get_page_params,
+    image_projection,
+    set_next_cursor,
 )
+from services.derivatives import (
+    delete_derivatives,
+    generate_derivatives,
+    pick_derivative,
+    supported_formats,
+)
+from services.embedding_codec import decode_embedding, embedding_to_list, encode_embedding
+from services.inference_cache import inference_cache
+from services.image_inference import submit_image_inference
+from services.uploads import MAX_IMAGE_UPLOAD_SIZE, UPLOAD_DIR, hash_file, remove_upload, save_upload
+from services.micro_batcher import preview_batcher
+from services.model_services import is_model_enabled, load_image
+from services.vector_index import get_image_index, index_image, unindex_image
+from services.search_index import get_search_index, index_image_text, unindex_image_text
 from PIL import Image
 import os
 import uuid
-import numpy as np
 
 
 router = APIRouter()
 
-UPLOAD_DIR = "uploads/images"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+class ImageDerivative(BaseModel):
+    width: int
+    height: int
+    format: str
+    path: str
+
 class ImageMetadata(BaseModel):
     filename: str
     height: int
     width: int
     filesize: int
+    content_hash: Optional[str] = None
+    derivatives: List[ImageDerivative] = []
 
 class ImagePublic(BaseModel):
     id: str = Field(alias="_id")
@@ -46,9 +72,16 @@ class ImagePublic(BaseModel):
     metadata: ImageMetadata
     admin: Optional[AdminInfo] = None
     project: Optional[ProjectInfo] = None
+    inference_status: Optional[str] = None
+    inference_job_id: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
+    @field_validator("embeddings", mode="before")
+    @classmethod
+    def decode_embeddings(cls, v):
+        return embedding_to_list(v)
+
     class Config:
         populate_by_name = True
 
@@ -58,7 +91,12 @@ class ImageUpdate(BaseModel):
     tags: Optional[List[str]] = None
 
 @router.get("/images")
-async def get_images(project_id: Optional[str] = None):
+async def get_images(
+    response: Response,
+    project_id: Optional[str] = None,
+    include_embeddings: bool = False,
+    page: PageParams = Depends(get_page_params)
+):
     try:
         images = []
         query = {}
@@ -68,20 +106,16 @@ async def get_images(project_id: Optional[str] = None):
                 raise HTTPException(status_code=400, detail="Invalid project ID")
             query["project_id"] = ObjectId(project_id)
 
-        cursor = image_collection.find(query)
-        async for doc in cursor:
+        docs, next_cursor = await fetch_page(
+            image_collection, query, page, image_projection(include_embeddings)
+        )
+        await attach_image_relations(docs)
+        set_next_cursor(response, next_cursor)
+
+        for doc in docs:
             try:
                 doc["_id"] = str(doc["_id"])
                 doc["project_id"] = str(doc["project_id"])
-
-                admin_info = await get_admin_info_by_id(doc.get("admin_id"))
-                project_info = await get_project_info_by_id(doc["project_id"])
-
-                if admin_info:
-                    doc["admin"] = admin_info
-                if project_info:
-                    doc["project"] = project_info
-
                 images.append(ImagePublic(**doc))
             except Exception:
                 continue
@@ -94,47 +128,39 @@ async def get_images(project_id: Optional[str] = None):
 
 
 @router.get("/images/search")
-async def search_images(q: str):
+async def search_images(
+    response: Response,
+    q: str,
+    include_embeddings: bool = False,
+    page: PageParams = Depends(get_offset_page_params)
+):
     try:
         if not q or not q.strip():
             raise HTTPException(status_code=400, detail="Query cannot be empty")
 
-        query_lower = q.strip().lower()
-
-        images = []
-        cursor = image_collection.find({})
-
+        offset = int(page.cursor) if page.cursor else 0
+        index = await get_search_index()
+        hits, total = index.search(q, offset=offset, limit=page.limit)
+        if offset + len(hits) < total:
+            set_next_cursor(response, str(offset + len(hits)))
+
+        hit_ids = [ObjectId(image_id) for image_id, _ in hits]
+        docs_by_id = {}
+        cursor = image_collection.find(
+            {"_id": {"$in": hit_ids}}, image_projection(include_embeddings)
+        )
         async for doc in cursor:
-            try:
-                matches = False
-
-                # Very lenient matching - just check if query word appears anywhere
-                if doc.get("title") and query_lower in doc["title"].lower():
-                    matches = True
-
-                if doc.get("ai_generated_caption") and query_lower in doc["ai_generated_caption"].lower():
-                    matches = True
-
-                # Check tags
-                if doc.get("tags"):
-                    for tag in doc["tags"]:
-                        if query_lower in tag.lower():
-                            matches = True
-                            break
+            docs_by_id[str(doc["_id"])] = doc
 
-                if matches:
-                    doc["_id"] = str(doc["_id"])
-                    doc["project_id"] = str(doc["project_id"])
+        docs = [docs_by_id[image_id] for image_id, _ in hits if image_id in docs_by_id]
+        await attach_image_relations(docs)
 
-                    admin_info = await get_admin_info_by_id(doc.get("admin_id"))
-                    project_info = await get_project_info_by_id(doc["project_id"])
-
-                    if admin_info:
-                        doc["admin"] = admin_info
-                    if project_info:
-                        doc["project"] = project_info
-
-                    images.append(ImagePublic(**doc))
+        images = []
+        for doc in docs:
+            try:
+                doc["_id"] = str(doc["_id"])
+                doc["project_id"] = str(doc["project_id"])
+                images.append(ImagePublic(**doc))
             except Exception as e:
                 print(f"Error processing image: {e}")
                 continue
@@ -156,82 +182,126 @@ async def get_image(id: str):
     doc["project_id"] = str(doc["project_id"])
     return ImagePublic(**doc)
 
+@router.get("/images/{id}/file")
+async def get_image_file(id: str, width: int = 640, format: str = "webp"):
+    if not ObjectId.is_valid(id):
+        raise HTTPException(status_code=400, detail="Invalid image ID")
+
+    if width < 1:
+        raise HTTPException(status_code=400, detail="Width must be positive")
+
+    if format not in supported_formats():
+        raise HTTPException(
+            status_code=400,
+            detail=f"Format must be one of: {', '.join(supported_formats())}"
+        )
+
+    image_doc = await get_image_by_id_or_404(id)
+    metadata = image_doc["metadata"]
+    derivatives = metadata.get("derivatives", [])
+
+    derivative = pick_derivative(derivatives, width, format)
+    if derivative is None:
+        # Images uploaded before derivatives existed get them on first request.
+        filename = metadata["filename"]
+        disk_path = os.path.join(UPLOAD_DIR, filename)
+        if not os.path.exists(disk_path):
+            raise HTTPException(status_code=404, detail="Image file not found")
+
+        new_derivatives = await run_in_threadpool(
+            generate_derivatives,
+            disk_path,
+            os.path.splitext(filename)[0],
+            None,
+            [format],
+        )
+        derivatives = derivatives + new_derivatives
+        await image_collection.update_many(
+            {"metadata.filename": filename},
+            {"$set": {"metadata.derivatives": derivatives}}
+        )
+        derivative = pick_derivative(derivatives, width, format)
+
+    if derivative is None:
+        return RedirectResponse(image_doc["path"])
+    return RedirectResponse(derivative["path"])
+
+
 @router.post("/images/ai-preview")
 async def ai_preview_image(file: UploadFile = File(...)):
     if not file.content_type or not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
 
-    contents = await file.read()
-    temp_path = f"/tmp/{uuid.uuid4()}"
+    if file.size is not None and file.size > MAX_IMAGE_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Max {MAX_IMAGE_UPLOAD_SIZE // (1024 * 1024)}MB"
+        )
 
-    with open(temp_path, "wb") as f:
-        f.write(contents)
+    fields = _producible_fields(("caption", "tags"))
+    if not fields:
+        raise HTTPException(status_code=503, detail="AI preview is disabled")
 
-    try:
-        caption = generate_caption(temp_path)
-        tags = predict_tags(temp_path)
-    finally:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+    content_hash = await run_in_threadpool(hash_file, file.file)
+    analysis = await inference_cache.get(content_hash, fields)
 
-    return {"caption": caption, "tags": tags}
+    if analysis is None:
+        # Decode once straight from the upload buffer; the batcher and every
+        # model reuse the same PIL image.
+        try:
+            image = await run_in_threadpool(load_image, file.file)
+        except Exception:
+            raise HTTPException(status_code=400, detail="File is not a readable image")
+
+        analysis = await preview_batcher.submit(image)
+        await inference_cache.put(content_hash, analysis)
+
+    # A disabled model leaves its part out of the analysis.
+    return {"caption": analysis.get("caption"), "tags": analysis.get("tags", [])}
 
 
 @router.get("/images/{id}/similar")
-async def get_similar_images(id: str, limit: int = 3):
+async def get_similar_images(id: str, limit: int = 3, scope: str = "photographer"):
     if not ObjectId.is_valid(id):
         raise HTTPException(status_code=400, detail="Invalid image ID")
 
+    if scope not in ("photographer", "all"):
+        raise HTTPException(status_code=400, detail="Scope must be 'photographer' or 'all'")
+
     target_image = await image_collection.find_one({"_id": ObjectId(id)})
     if not target_image:
         raise HTTPException(status_code=404, detail="Image not found")
 
-    target_tags = set(target_image.get("tags", []))
-
-    cursor = image_collection.find({
-        "admin_id": target_image["admin_id"],
-        "_id": {"$ne": ObjectId(id)}
-    })
-
-    similarities = []
+    index = await get_image_index()
+    neighbours = index.hybrid_search(
+        decode_embedding(target_image.get("embeddings")),
+        target_image.get("tags", []),
+        k=limit,
+        owner=target_image["admin_id"] if scope == "photographer" else None,
+        exclude=id,
+    )
 
+    candidate_ids = [ObjectId(image_id) for image_id, _ in neighbours]
+    docs_by_id = {}
+    cursor = image_collection.find(
+        {"_id": {"$in": candidate_ids}}, image_projection(False)
+    )
     async for img in cursor:
-        img_tags = set(img.get("tags", []))
-
-        if target_tags or img_tags:
-            tag_sim = len(target_tags & img_tags) / max(len(target_tags | img_tags), 1)
-        else:
-            tag_sim = 0.0
-
-        embedding_sim = 0.0
-        if target_image.get("embeddings") and img.get("embeddings"):
-            target_embedding = np.array(target_image["embeddings"], dtype=np.float32)
-            img_embedding = np.array(img["embeddings"], dtype=np.float32)
-
-            target_embedding /= np.linalg.norm(target_embedding)
-            img_embedding /= np.linalg.norm(img_embedding)
-
-            embedding_sim = float(np.dot(target_embedding, img_embedding))
-
-        final_score = 0.7 * tag_sim + 0.3 * embedding_sim
+        docs_by_id[str(img["_id"])] = img
 
-        similarities.append((img, final_score))
+    similarities = [
+        (docs_by_id[image_id], score)
+        for image_id, score in neighbours
+        if image_id in docs_by_id
+    ]
 
-    similarities.sort(key=lambda x: x[1], reverse=True)
+    top_docs = [img for img, _ in similarities[:limit]]
+    await attach_image_relations(top_docs)
 
     results = []
-    for img, _ in similarities[:limit]:
+    for img in top_docs:
         img["_id"] = str(img["_id"])
         img["project_id"] = str(img["project_id"])
-
-        admin_info = await get_admin_info_by_id(img.get("admin_id"))
-        project_info = await get_project_info_by_id(img["project_id"])
-
-        if admin_info:
-            img["admin"] = admin_info
-        if project_info:
-            img["project"] = project_info
-
         results.append(ImagePublic(**img))
 
     return results
@@ -264,17 +334,43 @@ async def upload_image(
     disk_path = os.path.join(UPLOAD_DIR, filename)
     public_path = f"/uploads/images/{filename}"
 
-    contents = await file.read()
-    filesize = len(contents)
-
-    with open(disk_path, "wb") as f:
-        f.write(contents)
+    stored = await save_upload(file, disk_path)
 
-    img = Image.open(disk_path)
-    width, height = img.size
-    img.close()
-
-    embeddings = extract_vit_embedding(disk_path)
+    try:
+        with Image.open(disk_path) as img:
+            width, height = img.size
+    except Exception:
+        remove_upload(disk_path)
+        raise HTTPException(status_code=400, detail="File is not a readable image")
+
+    # Identical bytes already on disk are shared instead of stored twice.
+    duplicate = await image_collection.find_one(
+        {"metadata.content_hash": stored.sha256},
+        {"metadata": 1, "path": 1}
+    )
+    if duplicate and os.path.exists(os.path.join(UPLOAD_DIR, duplicate["metadata"]["filename"])):
+        remove_upload(disk_path)
+        filename = duplicate["metadata"]["filename"]
+        disk_path = os.path.join(UPLOAD_DIR, filename)
+        public_path = duplicate["path"]
+        derivatives = duplicate["metadata"].get("derivatives", [])
+    else:
+        # The size probe only reads the header; a truncated or corrupt
+        # file first fails here, on the full decode.
+        try:
+            derivatives = await run_in_threadpool(
+                generate_derivatives, disk_path, os.path.splitext(filename)[0]
+            )
+        except Exception:
+            remove_upload(disk_path)
+            raise HTTPException(status_code=400, detail="File is not a readable image")
+
+    needed = ["embedding"]
+    if not caption:
+        needed.append("caption")
+    if not tags:
+        needed.append("tags")
+    cached = await inference_cache.get(stored.sha256, _producible_fields(needed))
 
     now = datetime.utcnow()
 
@@ -285,20 +381,43 @@ async def upload_image(
         "title": title,
         "ai_generated_caption": caption,
         "tags": tags.split(",") if tags else [],
-        "embeddings": embeddings,
+        "embeddings": encode_embedding(cached["embedding"]) if cached and "embedding" in cached else None,
+        "inference_status": "completed" if cached else "pending",
+        # Claimed by this worker, so the sweeper leaves it alone while it runs.
+        "inference_claimed_at": None if cached else now,
         "metadata": {
             "filename": filename,
             "height": height,
             "width": width,
-            "filesize": filesize
+            "filesize": stored.size,
+            "content_hash": stored.sha256,
+            "derivatives": derivatives
         },
         "created_at": now,
         "updated_at": now
     }
 
+    if cached:
+        if not caption:
+            image_doc["ai_generated_caption"] = cached.get("caption")
+        if not tags:
+            image_doc["tags"] = cached.get("tags", [])
+
     result = await image_collection.insert_one(image_doc)
 
     image_doc["_id"] = str(result.inserted_id)
+    await index_image(image_doc)
+    await index_image_text(image_doc)
+
+    if not cached:
+        job = submit_image_inference(
+            image_doc["_id"], disk_path, stored.sha256, caption=not caption, tags=not tags
+        )
+        await image_collection.update_one(
+            {"_id": result.inserted_id},
+            {"$set": {"inference_job_id": job.id}}
+        )
+        image_doc["inference_job_id"] = job.id
     image_doc["project_id"] = str(image_doc["project_id"])
 
     admin_info = await get_admin_info_by_id(image_doc["admin_id"])
@@ -312,18 +431,24 @@ async def upload_image(
     return ImagePublic(**image_doc)
 
 
+def _producible_fields(fields) -> list:
+    """Drop analysis fields whose model is disabled, so cache lookups can hit."""
+    models = {"caption": ("blip",), "tags": ("clip", "vit"), "embedding": ("vit",)}
+    return [field for field in fields if any(is_model_enabled(name) for name in models[field])]
+
+
 @router.patch("/images/{id}")
 async def patch_image(
     id: str,
     data: ImageUpdate,
-    current_admin: AdminInDB = Depends(get_current_admin)
+    current_admin_id: str = Depends(get_current_admin_id)
 ):
     if not ObjectId.is_valid(id):
         raise HTTPException(status_code=400, detail="Invalid image ID")
 
     image_doc = await get_image_by_id_or_404(id)
 
-    if image_doc["admin_id"] != str(current_admin.id):
+    if image_doc["admin_id"] != current_admin_id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
     update_data = data.model_dump(exclude_unset=True)
@@ -339,27 +464,35 @@ async def patch_image(
 
     updated = await get_image_with_relations(id)
     updated["_id"] = str(updated["_id"])
+    await index_image(updated)
+    await index_image_text(updated)
     updated["project_id"] = str(updated["project_id"])
     return ImagePublic(**updated)
 
 @router.delete("/images/{id}")
 async def delete_image(
     id: str,
-    current_admin: AdminInDB = Depends(get_current_admin)
+    current_admin_id: str = Depends(get_current_admin_id)
 ):
     if not ObjectId.is_valid(id):
         raise HTTPException(status_code=400, detail="Invalid image ID")
 
     image_doc = await get_image_by_id_or_404(id)
 
-    if image_doc["admin_id"] != str(current_admin.id):
+    if image_doc["admin_id"] != current_admin_id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
     filename = image_doc["metadata"]["filename"]
     disk_path = os.path.join(UPLOAD_DIR, filename)
 
-    if os.path.exists(disk_path):
-        os.remove(disk_path)
-
     await image_collection.delete_one({"_id": ObjectId(id)})
+
+    # Deduplicated uploads share one file; only the last reference removes it.
+    if not await image_collection.find_one({"metadata.filename": filename}, {"_id": 1}):
+        if os.path.exists(disk_path):
+            os.remove(disk_path)
+        delete_derivatives(image_doc["metadata"].get("derivatives", []))
+
+    await unindex_image(id)
+    await unindex_image_text(id)
     return {"message": "Image deleted successfully"}
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, HTTPException
+from services.image_inference import get_image_job
+from services.inference_jobs import inference_queue, InferenceJob
+
+router = APIRouter()
+
+@router.get("/jobs/{job_id}", response_model=InferenceJob)
+async def get_job(job_id: str):
+    # Jobs only live in the worker that queued them; anything else is
+    # answered from the image the job belongs to.
+    job = inference_queue.get(job_id) or await get_image_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -1,13 +1,14 @@
 from bson import ObjectId
 from datetime import datetime
 from dotenv import load_dotenv
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel, Field, field_validator
 from typing import Annotated, Optional
 import os
 from database import admin_collection, project_collection
-from dependencies.auth import get_current_admin, AdminInDB
-from dependencies.project_dependencies import get_project_by_id_or_404, get_admin_info_by_id, get_project_with_admin, AdminInfo
+from dependencies.auth import get_current_admin, get_current_admin_id, AdminInDB
+from dependencies.pagination import PageParams, fetch_page, get_page_params, set_next_cursor
+from dependencies.project_dependencies import get_project_by_id_or_404, get_admin_info_by_id, get_project_with_admin, attach_project_admins, AdminInfo
 
 load_dotenv()
 
@@ -38,16 +39,19 @@ class ProjectPublic(ProjectBase):
         populate_by_name = True
 
 @router.get("/projects")
-async def get_project():
+async def get_project(
+    response: Response,
+    page: PageParams = Depends(get_page_params)
+):
     try:
+        documents, next_cursor = await fetch_page(project_collection, {}, page)
+        await attach_project_admins(documents)
+        set_next_cursor(response, next_cursor)
+
         projects = []
-        cursor = project_collection.find({})
-        async for document in cursor:
+        for document in documents:
             try:
                 document["_id"] = str(document["_id"])
-                admin_info = await get_admin_info_by_id(document["admin_id"])
-                if admin_info:
-                    document["admin"] = admin_info
                 projects.append(ProjectPublic(**document))
             except Exception:
                 continue
@@ -69,7 +73,11 @@ async def get_project_by_id(id: str):
         raise HTTPException(status_code=500, detail=f"Failed to fetch project: {str(e)}")
 
 @router.get("/{username}/projects")
-async def get_user_projects(username: str):
+async def get_user_projects(
+    username: str,
+    response: Response,
+    page: PageParams = Depends(get_page_params)
+):
     try:
         if not username or len(username.strip()) == 0:
             raise HTTPException(status_code=400, detail="Username cannot be empty")
@@ -85,9 +93,13 @@ async def get_user_projects(username: str):
             photo=admin.get("photo")
         )
 
+        documents, next_cursor = await fetch_page(
+            project_collection, {'admin_id': str(admin["_id"])}, page
+        )
+        set_next_cursor(response, next_cursor)
+
         projects = []
-        cursor = project_collection.find({'admin_id': str(admin["_id"])})
-        async for document in cursor:
+        for document in documents:
             try:
                 document["_id"] = str(document["_id"])
                 document["admin"] = admin_info
@@ -139,7 +151,7 @@ async def post_project(
 async def patch_project(
     id: str,
     data: ProjectUpdate,
-    current_admin: AdminInDB = Depends(get_current_admin)
+    current_admin_id: str = Depends(get_current_admin_id)
 ):
     try:
         if not ObjectId.is_valid(id):
@@ -147,7 +159,7 @@ async def patch_project(
 
         project_doc = await get_project_by_id_or_404(id)
 
-        if project_doc["admin_id"] != str(current_admin.id):
+        if project_doc["admin_id"] != current_admin_id:
             raise HTTPException(status_code=403, detail="Not authorized to update this project")
 
         update_data = data.model_dump(exclude_unset=True)
@@ -176,7 +188,7 @@ async def patch_project(
 @router.delete("/projects/{id}")
 async def delete_project(
     id: str,
-    current_admin: AdminInDB = Depends(get_current_admin)
+    current_admin_id: str = Depends(get_current_admin_id)
 ):
     try:
         if not ObjectId.is_valid(id):
@@ -184,7 +196,7 @@ async def delete_project(
 
         project_doc = await get_project_by_id_or_404(id)
 
-        if project_doc["admin_id"] != str(current_admin.id):
+        if project_doc["admin_id"] != current_admin_id:
             raise HTTPException(status_code=403, detail="Not authorized to delete this project")
 
         result = await project_collection.delete_one({"_id": ObjectId(id)})
@@ -0,0 +1,17 @@
+from typing import List
+
+import numpy as np
+from PIL import Image
+
+
+# Kept free of model_services imports so benchmarks can time that import.
+def synthetic_images(count: int, size: int = 384) -> List[Image.Image]:
+    rng = np.random.default_rng(0)
+    images = []
+    for _ in range(count):
+        gradient = np.linspace(0, 255, size, dtype=np.float32)
+        base = np.stack(np.meshgrid(gradient, gradient[::-1]), axis=-1).mean(axis=-1)
+        noise = rng.normal(0, 40, size=(size, size, 3))
+        pixels = np.clip(base[..., None] * rng.uniform(0.3, 1.0, 3) + noise, 0, 255)
+        images.append(Image.fromarray(pixels.astype(np.uint8)))
+    return images
@@ -0,0 +1,111 @@
+import os
+from typing import Iterable, List, Optional
+
+from PIL import Image, ImageOps, features
+
+DERIVATIVE_DIR = "uploads/derivatives"
+DERIVATIVE_URL_PREFIX = "/uploads/derivatives"
+os.makedirs(DERIVATIVE_DIR, exist_ok=True)
+
+DERIVATIVE_WIDTHS = [
+    int(w) for w in os.getenv("DERIVATIVE_WIDTHS", "320,640,1280").split(",") if w.strip()
+]
+DERIVATIVE_FORMATS = [
+    f.strip() for f in os.getenv("DERIVATIVE_FORMATS", "webp,jpeg").split(",") if f.strip()
+]
+
+FORMAT_EXTENSIONS = {"webp": "webp", "jpeg": "jpg", "avif": "avif"}
+FORMAT_QUALITY = {"webp": 80, "jpeg": 82, "avif": 60}
+
+
+def supported_formats() -> List[str]:
+    formats = []
+    for fmt in DERIVATIVE_FORMATS:
+        if fmt not in FORMAT_EXTENSIONS:
+            continue
+        if fmt == "avif" and not features.check("avif"):
+            continue
+        formats.append(fmt)
+    return formats
+
+
+def derivative_filename(stem: str, width: int, fmt: str) -> str:
+    return f"{stem}_{width}w.{FORMAT_EXTENSIONS[fmt]}"
+
+
+def _target_widths(original_width: int, widths: Iterable[int]) -> List[int]:
+    # Never upscale; an image narrower than every target still gets one
+    # re-encoded copy at its own width.
+    targets = sorted({w for w in widths if w < original_width})
+    return targets or [original_width]
+
+
+def generate_derivatives(
+    source_path: str,
+    stem: str,
+    widths: Optional[Iterable[int]] = None,
+    formats: Optional[Iterable[str]] = None,
+) -> List[dict]:
+    widths = list(widths or DERIVATIVE_WIDTHS)
+    formats = [f for f in (formats or supported_formats()) if f in FORMAT_EXTENSIONS]
+
+    derivatives = []
+    with Image.open(source_path) as img:
+        # Let the JPEG decoder downscale by a power of two before the full
+        # decode when only small derivatives are needed. Both sides are
+        # kept above the largest width so EXIF rotation cannot undercut it.
+        largest = max(widths)
+        if min(img.size) > largest:
+            img.draft("RGB", (largest, largest))
+
+        base = ImageOps.exif_transpose(img).convert("RGB")
+
+    try:
+        for width in _target_widths(base.width, widths):
+            height = max(1, round(base.height * width / base.width))
+            resized = base if width == base.width else base.resize((width, height), Image.LANCZOS)
+
+            for fmt in formats:
+                filename = derivative_filename(stem, width, fmt)
+                derivative = {
+                    "width": width,
+                    "height": height,
+                    "format": fmt,
+                    "path": f"{DERIVATIVE_URL_PREFIX}/{filename}",
+                }
+                # Recorded before saving so a failed save is cleaned up too.
+                derivatives.append(derivative)
+                resized.save(
+                    os.path.join(DERIVATIVE_DIR, filename),
+                    format=fmt.upper(),
+                    quality=FORMAT_QUALITY[fmt],
+                )
+    except Exception:
+        delete_derivatives(derivatives)
+        raise
+
+    return derivatives
+
+
+def pick_derivative(derivatives: List[dict], width: int, fmt: str) -> Optional[dict]:
+    candidates = sorted(
+        (d for d in derivatives if d["format"] == fmt),
+        key=lambda d: d["width"],
+    )
+    if not candidates:
+        return None
+    for derivative in candidates:
+        if derivative["width"] >= width:
+            return derivative
+    return candidates[-1]
+
+
+def delete_derivatives(derivatives: Iterable[dict]) -> None:
+    for derivative in derivatives:
+        filename = os.path.basename(derivative.get("path", ""))
+        disk_path = os.path.join(DERIVATIVE_DIR, filename)
+        if filename and os.path.exists(disk_path):
+            try:
+                os.remove(disk_path)
+            except OSError:
+                pass
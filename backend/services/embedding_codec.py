@@ -0,0 +1,70 @@
+import os
+import struct
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+from bson.binary import Binary
+
+# Embeddings are stored as BSON binary (user-defined subtype) holding a
+# one-byte dtype code followed by little-endian values. int8 payloads are
+# prefixed with their float32 scale.
+EMBEDDING_BINARY_SUBTYPE = 0x80
+EMBEDDING_STORAGE_DTYPE = os.getenv("EMBEDDING_STORAGE_DTYPE", "float32")
+
+DTYPE_CODES = {"float32": 1, "float16": 2, "int8": 3}
+CODE_DTYPES = {code: name for name, code in DTYPE_CODES.items()}
+
+EmbeddingValue = Union[Binary, bytes, Sequence[float], np.ndarray, None]
+
+
+def encode_embedding(vector: Sequence[float], dtype: Optional[str] = None) -> Binary:
+    dtype = dtype or EMBEDDING_STORAGE_DTYPE
+    if dtype not in DTYPE_CODES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+
+    array = np.asarray(vector, dtype=np.float32).reshape(-1)
+    header = bytes([DTYPE_CODES[dtype]])
+
+    if dtype == "float32":
+        payload = array.astype("<f4").tobytes()
+    elif dtype == "float16":
+        payload = array.astype("<f2").tobytes()
+    else:
+        max_abs = float(np.abs(array).max()) if array.size else 0.0
+        scale = max_abs / 127 if max_abs > 0 else 1.0
+        quantized = np.clip(np.round(array / scale), -127, 127).astype(np.int8)
+        payload = struct.pack("<f", scale) + quantized.tobytes()
+
+    return Binary(header + payload, EMBEDDING_BINARY_SUBTYPE)
+
+
+def decode_embedding(value: EmbeddingValue) -> Optional[np.ndarray]:
+    if value is None:
+        return None
+
+    if isinstance(value, np.ndarray):
+        return value.astype(np.float32, copy=False)
+
+    if isinstance(value, (Binary, bytes)):
+        data = memoryview(bytes(value))
+        if len(data) == 0:
+            return None
+
+        dtype = CODE_DTYPES.get(data[0])
+        if dtype == "float32":
+            return np.frombuffer(data, dtype="<f4", offset=1)
+        if dtype == "float16":
+            return np.frombuffer(data, dtype="<f2", offset=1).astype(np.float32)
+        if dtype == "int8":
+            (scale,) = struct.unpack_from("<f", data, 1)
+            return np.frombuffer(data, dtype=np.int8, offset=5).astype(np.float32) * scale
+        raise ValueError(f"Unknown embedding dtype code: {data[0]}")
+
+    if len(value) == 0:
+        return None
+    return np.asarray(value, dtype=np.float32)
+
+
+def embedding_to_list(value: EmbeddingValue) -> Optional[List[float]]:
+    array = decode_embedding(value)
+    return None if array is None else array.tolist()
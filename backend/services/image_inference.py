@@ -0,0 +1,200 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from database import image_collection
+from services.embedding_codec import encode_embedding
+from services.inference_cache import inference_cache
+from services.inference_jobs import InferenceJob, inference_queue
+from services.micro_batcher import get_upload_batcher
+from services.search_index import index_image_text
+from services.uploads import UPLOAD_DIR
+from services.vector_index import index_image
+
+INFERENCE_MAX_ATTEMPTS = int(os.getenv("INFERENCE_MAX_ATTEMPTS", "3"))
+# A pending image is claimed by the worker running its job; the claim is
+# renewed every sweep, so images whose worker died or restarted are picked
+# up by another sweep once it expires.
+INFERENCE_LEASE_SECONDS = float(os.getenv("INFERENCE_LEASE_SECONDS", "120"))
+INFERENCE_SWEEP_INTERVAL = float(os.getenv("INFERENCE_SWEEP_INTERVAL", "30"))
+INFERENCE_SWEEP_BATCH = int(os.getenv("INFERENCE_SWEEP_BATCH", "100"))
+
+# Images this process has a job for, so their claims can be renewed.
+_active: set = set()
+
+
+def submit_image_inference(
+    image_id: str,
+    disk_path: str,
+    content_hash: str,
+    caption: bool,
+    tags: bool,
+    job_id: Optional[str] = None,
+) -> InferenceJob:
+    _active.add(image_id)
+    return inference_queue.submit(
+        "image_upload",
+        get_upload_batcher(caption, tags).submit,
+        disk_path,
+        job_id=job_id,
+        on_complete=partial(apply_inference_result, image_id, content_hash),
+        on_error=partial(mark_inference_failed, image_id),
+    )
+
+
+async def apply_inference_result(image_id: str, content_hash: str, analysis: dict):
+    _active.discard(image_id)
+    await inference_cache.put(content_hash, analysis)
+
+    # updated_at lets other workers' in-memory indexes pick up the result.
+    now = datetime.utcnow()
+    image_filter = {"_id": ObjectId(image_id)}
+
+    # Caption and tags are only filled in while still empty, so an edit
+    # made through PATCH while the job was pending is kept.
+    if "caption" in analysis:
+        await image_collection.update_one(
+            {**image_filter, "ai_generated_caption": {"$in": [None, ""]}},
+            {"$set": {"ai_generated_caption": analysis["caption"], "updated_at": now}}
+        )
+    if "tags" in analysis:
+        await image_collection.update_one(
+            {**image_filter, "tags": {"$in": [None, []]}},
+            {"$set": {"tags": analysis["tags"], "updated_at": now}}
+        )
+
+    update_data = {"inference_status": "completed", "updated_at": now}
+    if "embedding" in analysis:
+        update_data["embeddings"] = encode_embedding(analysis["embedding"])
+
+    updated = await image_collection.find_one_and_update(
+        image_filter,
+        {"$set": update_data, "$unset": {"inference_error": ""}},
+        return_document=ReturnDocument.AFTER
+    )
+    if updated:
+        await index_image(updated)
+        await index_image_text(updated)
+
+
+async def mark_inference_failed(image_id: str, error: Exception):
+    _active.discard(image_id)
+    await image_collection.update_one(
+        {"_id": ObjectId(image_id)},
+        {
+            "$set": {"inference_status": "failed", "inference_error": str(error)},
+            "$inc": {"inference_attempts": 1},
+        }
+    )
+
+
+def _resumable(stale_before: datetime) -> dict:
+    return {
+        "$and": [
+            {"$or": [
+                {"inference_status": "pending"},
+                {"inference_status": "failed", "inference_attempts": {"$lt": INFERENCE_MAX_ATTEMPTS}},
+            ]},
+            {"$or": [
+                {"inference_claimed_at": {"$lt": stale_before}},
+                {"inference_claimed_at": None},
+            ]},
+        ]
+    }
+
+
+async def resume_image_inference() -> int:
+    """Resubmit pending images nobody holds a claim on, and retry failed ones.
+
+    Each image is claimed with a conditional update first, so several
+    workers sweeping at once never run the same image twice. The job keeps
+    the image's original job id so clients polling it are not lost.
+    """
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=INFERENCE_LEASE_SECONDS)
+    resumed = 0
+
+    cursor = image_collection.find(
+        _resumable(stale_before),
+        {"_id": 1},
+    ).limit(INFERENCE_SWEEP_BATCH)
+    candidates = [doc["_id"] async for doc in cursor]
+
+    for oid in candidates:
+        doc = await image_collection.find_one_and_update(
+            {"_id": oid, **_resumable(stale_before)},
+            {"$set": {"inference_status": "pending", "inference_claimed_at": now}},
+            return_document=ReturnDocument.AFTER
+        )
+        if not doc:
+            continue
+
+        image_id = str(oid)
+        disk_path = os.path.join(UPLOAD_DIR, doc["metadata"]["filename"])
+        if not os.path.exists(disk_path):
+            await image_collection.update_one(
+                {"_id": oid},
+                {"$set": {
+                    "inference_status": "failed",
+                    "inference_error": "Image file is missing",
+                    "inference_attempts": INFERENCE_MAX_ATTEMPTS,
+                }}
+            )
+            continue
+
+        job = submit_image_inference(
+            image_id,
+            disk_path,
+            doc["metadata"].get("content_hash"),
+            caption=not doc.get("ai_generated_caption"),
+            tags=not doc.get("tags"),
+            job_id=doc.get("inference_job_id"),
+        )
+        if job.id != doc.get("inference_job_id"):
+            await image_collection.update_one({"_id": oid}, {"$set": {"inference_job_id": job.id}})
+        resumed += 1
+
+    return resumed
+
+
+async def renew_inference_claims() -> None:
+    if _active:
+        await image_collection.update_many(
+            {"_id": {"$in": [ObjectId(image_id) for image_id in _active]}, "inference_status": "pending"},
+            {"$set": {"inference_claimed_at": datetime.utcnow()}}
+        )
+
+
+async def run_inference_sweeper() -> None:
+    """Started from the lifespan: renews this worker's claims and resumes orphans."""
+    while True:
+        try:
+            await renew_inference_claims()
+            await resume_image_inference()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Inference sweep failed: {e}")
+        await asyncio.sleep(INFERENCE_SWEEP_INTERVAL)
+
+
+async def get_image_job(job_id: str) -> Optional[InferenceJob]:
+    """A job's state from its image, for jobs queued by another worker or process."""
+    doc = await image_collection.find_one(
+        {"inference_job_id": job_id},
+        {"inference_status": 1, "inference_error": 1, "created_at": 1},
+    )
+    if not doc:
+        return None
+    return InferenceJob(
+        id=job_id,
+        kind="image_upload",
+        status=doc.get("inference_status") or "pending",
+        error=doc.get("inference_error"),
+        created_at=doc["created_at"],
+    )
@@ -0,0 +1,89 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from database import image_collection
+
+# Every worker keeps its own in-memory indexes; these settings control how
+# quickly writes handled by other workers show up in them.
+INDEX_REFRESH_INTERVAL = float(os.getenv("INDEX_REFRESH_INTERVAL", "5"))
+INDEX_RECONCILE_INTERVAL = float(os.getenv("INDEX_RECONCILE_INTERVAL", "300"))
+# Documents written within this window before the last poll are read again,
+# covering clock skew between workers and writes still in flight.
+INDEX_REFRESH_OVERLAP = timedelta(seconds=float(os.getenv("INDEX_REFRESH_OVERLAP", "30")))
+
+
+class IndexSync:
+    """Keeps a per-process image index in step with the image collection.
+
+    Writes made by this process are applied directly through apply() and
+    discard(). Writes made by other workers are picked up by polling
+    `updated_at`, and deletes by periodically comparing the indexed ids
+    with the collection. A document is only re-applied when its
+    `updated_at` has changed.
+    """
+
+    def __init__(
+        self,
+        projection: Dict[str, int],
+        add: Callable[[dict], None],
+        remove: Callable[[str], None],
+    ):
+        self.projection = {**projection, "updated_at": 1}
+        self._add = add
+        self._remove = remove
+        self._versions: Dict[str, Optional[datetime]] = {}
+        self._synced_at: Optional[datetime] = None
+        self._next_refresh = 0.0
+        self._next_reconcile = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._synced_at is not None
+
+    def apply(self, doc: dict) -> None:
+        image_id = str(doc["_id"])
+        version = doc.get("updated_at")
+        if image_id in self._versions and version is not None and self._versions[image_id] == version:
+            return
+        self._add(doc)
+        self._versions[image_id] = version
+
+    def discard(self, image_id: str) -> None:
+        self._versions.pop(image_id, None)
+        self._remove(image_id)
+
+    async def load(self) -> None:
+        started = datetime.utcnow()
+        async for doc in image_collection.find({}, self.projection):
+            self.apply(doc)
+        self._synced_at = started
+        self._next_refresh = time.monotonic() + INDEX_REFRESH_INTERVAL
+        self._next_reconcile = time.monotonic() + INDEX_RECONCILE_INTERVAL
+
+    async def refresh(self, force: bool = False) -> None:
+        if not force and time.monotonic() < self._next_refresh:
+            return
+
+        async with self._lock:
+            if not force and time.monotonic() < self._next_refresh:
+                return
+            assert self._synced_at is not None
+
+            started = datetime.utcnow()
+            since = self._synced_at - INDEX_REFRESH_OVERLAP
+            async for doc in image_collection.find({"updated_at": {"$gte": since}}, self.projection):
+                self.apply(doc)
+            self._synced_at = started
+            self._next_refresh = time.monotonic() + INDEX_REFRESH_INTERVAL
+
+            if force or time.monotonic() >= self._next_reconcile:
+                live = set()
+                async for doc in image_collection.find({}, {"_id": 1}):
+                    live.add(str(doc["_id"]))
+                for image_id in set(self._versions) - live:
+                    self.discard(image_id)
+                self._next_reconcile = time.monotonic() + INDEX_RECONCILE_INTERVAL
@@ -0,0 +1,122 @@
+import json
+import os
+from collections import OrderedDict
+from datetime import datetime
+from typing import Iterable, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from database import inference_cache_collection
+from services.model_services import MODEL_DIR, model_revision
+
+INFERENCE_CACHE_SIZE = int(os.getenv("INFERENCE_CACHE_SIZE", "1024"))
+# "memory", or "mongo"/"disk" to keep results across restarts and workers.
+INFERENCE_CACHE_BACKEND = os.getenv("INFERENCE_CACHE_BACKEND", "memory")
+INFERENCE_CACHE_DIR = os.path.join(MODEL_DIR, "inference_cache")
+
+CACHEABLE_FIELDS = ("caption", "clip_tags", "vit_tags", "tags", "embedding")
+
+
+class InferenceCache:
+    """Analysis results keyed by content hash and model revision.
+
+    Entries hold whichever fields have been computed so far; a lookup only
+    hits when every requested field is present.
+    """
+
+    def __init__(self, max_size: int = INFERENCE_CACHE_SIZE, backend: str = INFERENCE_CACHE_BACKEND):
+        if backend not in ("memory", "mongo", "disk"):
+            raise ValueError(f"Unknown inference cache backend: {backend}")
+
+        self.max_size = max_size
+        self.backend = backend
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, content_hash: str) -> str:
+        return f"{content_hash}:{model_revision()}"
+
+    def _remember(self, key: str, entry: dict) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(INFERENCE_CACHE_DIR, f"{key.replace(':', '_')}.json")
+
+    def _read_disk(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._disk_path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, entry: dict) -> None:
+        os.makedirs(INFERENCE_CACHE_DIR, exist_ok=True)
+        path = self._disk_path(key)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(entry, f)
+        os.replace(f"{path}.tmp", path)
+
+    async def _load(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+
+        if self.backend == "mongo":
+            doc = await inference_cache_collection.find_one({"_id": key})
+            if doc:
+                entry = {k: doc[k] for k in CACHEABLE_FIELDS if k in doc}
+        elif self.backend == "disk":
+            entry = await run_in_threadpool(self._read_disk, key)
+
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    async def get(self, content_hash: str, fields: Iterable[str]) -> Optional[dict]:
+        entry = await self._load(self._key(content_hash))
+        if entry is None or any(field not in entry for field in fields):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return dict(entry)
+
+    async def put(self, content_hash: str, result: dict) -> None:
+        key = self._key(content_hash)
+        update = {k: v for k, v in result.items() if k in CACHEABLE_FIELDS}
+        if not update:
+            return
+
+        entry = dict(self._entries.get(key) or {})
+        entry.update(update)
+        self._remember(key, entry)
+
+        try:
+            if self.backend == "mongo":
+                await inference_cache_collection.update_one(
+                    {"_id": key},
+                    {"$set": {**update, "updated_at": datetime.utcnow()}},
+                    upsert=True
+                )
+            elif self.backend == "disk":
+                await run_in_threadpool(self._write_disk, key, entry)
+        except Exception:
+            # The persistent tier is best effort; memory already has it.
+            pass
+
+    def metrics(self) -> dict:
+        return {
+            "backend": self.backend,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+inference_cache = InferenceCache()
@@ -0,0 +1,138 @@
+import os
+import queue
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import SocketClient, answer_challenge, deliver_challenge
+from typing import List, Optional, Sequence
+
+from PIL import Image
+
+from services.model_services import ImageInput, MLServiceError, load_image
+from services import model_services
+
+# When set, inference is sent to a separate inference_server.py process
+# instead of loading the models into every API worker.
+INFERENCE_SERVER_SOCKET = os.getenv("INFERENCE_SERVER_SOCKET", "")
+INFERENCE_SERVER_AUTHKEY = os.getenv("INFERENCE_SERVER_AUTHKEY", "").encode()
+INFERENCE_CLIENT_POOL_SIZE = int(os.getenv("INFERENCE_CLIENT_POOL_SIZE", "4"))
+INFERENCE_CONNECT_TIMEOUT = float(os.getenv("INFERENCE_CONNECT_TIMEOUT", "5"))
+INFERENCE_REQUEST_TIMEOUT = float(os.getenv("INFERENCE_REQUEST_TIMEOUT", "120"))
+
+# Idle connections for reuse, and a cap on how many this process holds at once.
+_idle: "queue.LifoQueue" = queue.LifoQueue()
+_slots = threading.BoundedSemaphore(max(1, INFERENCE_CLIENT_POOL_SIZE))
+
+
+def remote_enabled() -> bool:
+    return bool(INFERENCE_SERVER_SOCKET)
+
+
+def encode_image(image: ImageInput):
+    """Convert an input into something picklable and cheap to rebuild."""
+    if isinstance(image, (str, os.PathLike)):
+        return {"path": os.path.abspath(image)}
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return {"bytes": bytes(image)}
+
+    pil_image = load_image(image)
+    return {"raw": pil_image.tobytes(), "mode": pil_image.mode, "size": pil_image.size}
+
+
+def decode_image(payload: dict):
+    if "path" in payload:
+        return payload["path"]
+    if "bytes" in payload:
+        return payload["bytes"]
+    return Image.frombytes(payload["mode"], tuple(payload["size"]), payload["raw"])
+
+
+def _connect():
+    if not INFERENCE_SERVER_AUTHKEY:
+        raise MLServiceError("INFERENCE_SERVER_AUTHKEY is not set")
+
+    # Client() has no timeout, so the handshake is done by hand and the
+    # first read is guarded with poll().
+    conn = SocketClient(INFERENCE_SERVER_SOCKET)
+    try:
+        if not conn.poll(INFERENCE_CONNECT_TIMEOUT):
+            raise MLServiceError("Inference server did not accept the connection in time")
+        answer_challenge(conn, INFERENCE_SERVER_AUTHKEY)
+        deliver_challenge(conn, INFERENCE_SERVER_AUTHKEY)
+    except BaseException:
+        conn.close()
+        raise
+    return conn
+
+
+def _exchange(conn, message: dict, timeout: float):
+    conn.send(message)
+    if not conn.poll(timeout):
+        raise MLServiceError("Inference server timed out")
+    return conn.recv()
+
+
+def _request(message: dict, timeout: float = INFERENCE_REQUEST_TIMEOUT):
+    if not _slots.acquire(timeout=timeout):
+        raise MLServiceError("Inference client pool exhausted")
+    try:
+        try:
+            conn = _idle.get_nowait()
+        except queue.Empty:
+            conn = None
+
+        if conn is not None:
+            try:
+                response = _exchange(conn, message, timeout)
+            except (OSError, EOFError):
+                # The server worker behind this idle connection restarted.
+                conn.close()
+                conn = None
+            except MLServiceError:
+                # A late reply would desynchronise the connection; drop it.
+                conn.close()
+                raise
+
+        if conn is None:
+            try:
+                conn = _connect()
+                response = _exchange(conn, message, timeout)
+            except (OSError, EOFError, AuthenticationError) as e:
+                if conn is not None:
+                    conn.close()
+                raise MLServiceError(f"Inference server unavailable: {str(e)}")
+            except MLServiceError:
+                if conn is not None:
+                    conn.close()
+                raise
+
+        _idle.put(conn)
+    finally:
+        _slots.release()
+
+    if not response.get("ok"):
+        raise MLServiceError(response.get("error", "Inference server error"))
+    return response.get("result")
+
+
+def analyze_image_batch(images: Sequence[ImageInput], **kwargs) -> List[dict]:
+    if not remote_enabled():
+        return model_services.analyze_image_batch(images, **kwargs)
+
+    return _request({
+        "op": "analyze",
+        "images": [encode_image(image) for image in images],
+        "kwargs": kwargs,
+    })
+
+
+def analyze_image(image: ImageInput, **kwargs) -> dict:
+    return analyze_image_batch([image], **kwargs)[0]
+
+
+def server_status() -> Optional[dict]:
+    if not remote_enabled():
+        return None
+    try:
+        return _request({"op": "status"}, timeout=INFERENCE_CONNECT_TIMEOUT)
+    except MLServiceError:
+        return None
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, Awaitable, Callable, Optional
+
+from pydantic import BaseModel
+
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))
+# Previews run on their own workers so an interactive request never waits
+# behind a bulk upload's backlog.
+PREVIEW_WORKERS = int(os.getenv("PREVIEW_WORKERS", "1"))
+JOB_RETENTION = int(os.getenv("INFERENCE_JOB_RETENTION", "1000"))
+
+
+class InferenceJob(BaseModel):
+    id: str
+    kind: str
+    status: str = "pending"
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class InferenceQueue:
+    """Runs model calls on a dedicated worker pool off the event loop.
+
+    The models are module-level globals in model_services, so every
+    worker thread shares one loaded copy; torch releases the GIL inside
+    its kernels, letting the event loop keep serving other requests.
+    """
+
+    def __init__(self, workers: int = INFERENCE_WORKERS, name: str = "inference"):
+        self.workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix=name
+        )
+        self._jobs: "OrderedDict[str, InferenceJob]" = OrderedDict()
+        self._tasks: set = set()
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    def submit(
+        self,
+        kind: str,
+        fn: Callable,
+        *args,
+        job_id: Optional[str] = None,
+        on_complete: Optional[Callable[[Any], Awaitable]] = None,
+        on_error: Optional[Callable[[Exception], Awaitable]] = None,
+        **kwargs,
+    ) -> InferenceJob:
+        job = InferenceJob(id=job_id or uuid.uuid4().hex, kind=kind, created_at=datetime.utcnow())
+        self._jobs[job.id] = job
+        while len(self._jobs) > JOB_RETENTION:
+            self._jobs.popitem(last=False)
+
+        task = asyncio.create_task(
+            self._execute(job, fn, args, kwargs, on_complete, on_error)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _execute(self, job, fn, args, kwargs, on_complete, on_error) -> None:
+        def call():
+            job.status = "running"
+            job.started_at = datetime.utcnow()
+            return fn(*args, **kwargs)
+
+        try:
+            if asyncio.iscoroutinefunction(fn):
+                # e.g. a MicroBatcher.submit that itself runs on this queue
+                job.status = "running"
+                job.started_at = datetime.utcnow()
+                result = await fn(*args, **kwargs)
+            else:
+                result = await self.run(call)
+            if on_complete:
+                await on_complete(result)
+            job.status = "completed"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            if on_error:
+                try:
+                    await on_error(e)
+                except Exception:
+                    pass
+        finally:
+            job.finished_at = datetime.utcnow()
+
+    def get(self, job_id: str) -> Optional[InferenceJob]:
+        return self._jobs.get(job_id)
+
+    def pending_count(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status in ("pending", "running"))
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+inference_queue = InferenceQueue()
+preview_queue = InferenceQueue(PREVIEW_WORKERS, name="preview")
@@ -0,0 +1,142 @@
+import asyncio
+import os
+from collections import Counter
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from functools import partial
+
+from services.inference_jobs import inference_queue, preview_queue, InferenceQueue
+from services.inference_client import analyze_image_batch
+
+PREVIEW_BATCH_WINDOW_MS = float(os.getenv("PREVIEW_BATCH_WINDOW_MS", "20"))
+PREVIEW_BATCH_MAX_SIZE = int(os.getenv("PREVIEW_BATCH_MAX_SIZE", "8"))
+UPLOAD_BATCH_WINDOW_MS = float(os.getenv("UPLOAD_BATCH_WINDOW_MS", "100"))
+UPLOAD_BATCH_MAX_SIZE = int(os.getenv("UPLOAD_BATCH_MAX_SIZE", "8"))
+
+
+class MicroBatcher:
+    """Groups concurrent single-item requests into one batched model call.
+
+    The first request to arrive opens a window of window_ms; everything
+    queued before it closes (up to max_batch_size items) is passed to
+    batch_fn together and the results are fanned back out in order.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[Sequence[Any]], List[Any]],
+        window_ms: float = PREVIEW_BATCH_WINDOW_MS,
+        max_batch_size: int = PREVIEW_BATCH_MAX_SIZE,
+        runner: InferenceQueue = inference_queue,
+    ):
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000
+        self.max_batch_size = max(1, max_batch_size)
+        self.runner = runner
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.batches = 0
+        self.items = 0
+        self.max_queue_depth = 0
+        self.batch_sizes: Counter = Counter()
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        if self._queue is None or self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        return self._queue
+
+    async def submit(self, item: Any) -> Any:
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((item, future))
+        self.max_queue_depth = max(self.max_queue_depth, queue.qsize())
+        return await future
+
+    async def _collect(self, queue: asyncio.Queue) -> List[Tuple[Any, asyncio.Future]]:
+        batch = [await queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+
+        while True:
+            batch = await self._collect(queue)
+            batch = [(item, future) for item, future in batch if not future.cancelled()]
+            if not batch:
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            self.batch_sizes[len(batch)] += 1
+
+            try:
+                results = await self.runner.run(self.batch_fn, [item for item, _ in batch])
+            except Exception:
+                # One bad input should not fail everyone it was batched with.
+                await self._run_individually(batch)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def _run_individually(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        for item, future in batch:
+            try:
+                result = (await self.runner.run(self.batch_fn, [item]))[0]
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+    def metrics(self) -> dict:
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch_size": self.max_batch_size,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+        }
+
+
+# Previews also compute the embedding: it comes from the same ViT pass as
+# the tags, and caching it lets the upload that follows skip inference.
+preview_batcher = MicroBatcher(analyze_image_batch, runner=preview_queue)
+
+# Upload jobs are batched per combination of requested fields, so an
+# upload with a user caption never pays for BLIP.
+upload_batchers = {
+    (caption, tags): MicroBatcher(
+        partial(analyze_image_batch, caption=caption, tags=tags, embedding=True),
+        window_ms=UPLOAD_BATCH_WINDOW_MS,
+        max_batch_size=UPLOAD_BATCH_MAX_SIZE,
+        runner=inference_queue,
+    )
+    for caption in (True, False)
+    for tags in (True, False)
+}
+
+
+def get_upload_batcher(caption: bool, tags: bool) -> MicroBatcher:
+    return upload_batchers[(caption, tags)]
@@ -10,15 +10,44 @@ from transformers import (
     ViTModel,
     BatchEncoding,
 )
+import io
 import os
-from typing import Optional, List, cast
+from typing import BinaryIO, Dict, Optional, List, Iterator, Sequence, Tuple, Union, cast
+import hashlib
+import json
 import re
+import gc
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 MODEL_DIR = "models"
 os.makedirs(MODEL_DIR, exist_ok=True)
 
+MAX_BATCH_SIZE = int(os.getenv("MODEL_MAX_BATCH_SIZE", "8"))
+
+BLIP_MODEL_NAME = "Salesforce/blip-image-captioning-base"
+CLIP_MODEL_NAME = "openai/clip-vit-base-patch32"
+VIT_MODEL_NAME = "google/vit-base-patch16-224"
+CLIP_TEXT_CACHE_DIR = os.path.join(MODEL_DIR, "clip_text_features")
+
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
+# Intra-op threads parallelize a single forward pass; inter-op threads run
+# independent ops concurrently. Unset leaves torch's defaults.
+TORCH_NUM_THREADS = int(os.getenv("TORCH_NUM_THREADS", "0"))
+TORCH_NUM_INTEROP_THREADS = int(os.getenv("TORCH_NUM_INTEROP_THREADS", "0"))
+
+if TORCH_NUM_THREADS > 0:
+    torch.set_num_threads(TORCH_NUM_THREADS)
+if TORCH_NUM_INTEROP_THREADS > 0:
+    try:
+        torch.set_num_interop_threads(TORCH_NUM_INTEROP_THREADS)
+    except RuntimeError:
+        # Only settable before torch runs any inter-op parallel work.
+        pass
+
 blip_processor: Optional[BlipProcessor] = None
 blip_model: Optional[BlipForConditionalGeneration] = None
 clip_processor: Optional[CLIPProcessor] = None
@@ -37,59 +66,292 @@ CLIP_CATEGORIES = [
     "abstract", "minimalist", "macro"
 ]
 
+# Normalized CLIP text embeddings keyed by category vocabulary.
+_clip_text_features: Dict[Tuple[str, ...], torch.Tensor] = {}
+
+# Paths, raw bytes, open binary files, decoded PIL images or CHW tensors.
+ImageInput = Union[str, os.PathLike, bytes, BinaryIO, Image.Image, torch.Tensor]
+
 class MLServiceError(Exception):
     pass
 
-def load_models() -> None:
+MODEL_NAMES = ("blip", "clip", "vit")
+
+# Inference backend per model, e.g. BLIP_BACKEND=int8:
+#   eager - fp32 eager mode
+#   int8  - dynamically quantized nn.Linear layers (CPU only)
+#   bf16  - bfloat16 weights and activations
+INFERENCE_BACKENDS = ("eager", "int8", "bf16")
+MODEL_BACKENDS = {
+    name: os.getenv(f"{name.upper()}_BACKEND", "eager") for name in MODEL_NAMES
+}
+
+def _model_list(env_name: str, default: Sequence[str]) -> List[str]:
+    value = os.getenv(env_name)
+    names = default if value is None else [n.strip() for n in value.split(",") if n.strip()]
+    return [name for name in names if name in MODEL_NAMES]
+
+# Deployments that never caption (or tag) can drop those models entirely.
+ENABLED_MODELS = _model_list("ENABLED_MODELS", MODEL_NAMES)
+
+# Models to load (and warm up) when the API starts; empty disables preloading.
+# Preloaded models are pinned and never unloaded for being idle.
+PRELOAD_MODELS = [
+    name for name in _model_list("PRELOAD_MODELS", MODEL_NAMES)
+    if name in ENABLED_MODELS
+]
+
+# Seconds a lazily loaded model may sit unused before it is unloaded; 0 keeps
+# models loaded forever.
+MODEL_IDLE_TTL = float(os.getenv("MODEL_IDLE_TTL", "0"))
+
+# Inference runs on a worker pool, so each model loads behind its own lock;
+# different models can still load in parallel.
+_load_locks = {name: threading.Lock() for name in MODEL_NAMES}
+_in_use = {name: 0 for name in MODEL_NAMES}
+_last_used = {name: 0.0 for name in MODEL_NAMES}
+_reaper: Optional[threading.Thread] = None
+
+model_status: Dict[str, dict] = {
+    name: {
+        "status": "not_loaded" if name in ENABLED_MODELS else "disabled",
+        "load_seconds": None,
+        "error": None,
+    }
+    for name in MODEL_NAMES
+}
+
+def _load_blip() -> None:
     global blip_processor, blip_model
+
+    blip_processor = BlipProcessor.from_pretrained(
+        BLIP_MODEL_NAME,
+        cache_dir=MODEL_DIR,
+    )
+    model = BlipForConditionalGeneration.from_pretrained(
+        BLIP_MODEL_NAME,
+        cache_dir=MODEL_DIR,
+    )
+    model.to(device)
+    model.eval()
+    blip_model = _apply_backend("blip", model)
+
+def _unload_blip() -> None:
+    global blip_processor, blip_model
+    blip_processor, blip_model = None, None
+
+def _load_clip() -> None:
+    global clip_processor, clip_model
+
+    clip_processor = CLIPProcessor.from_pretrained(
+        CLIP_MODEL_NAME,
+        cache_dir=MODEL_DIR,
+    )
+    model = CLIPModel.from_pretrained(
+        CLIP_MODEL_NAME,
+        cache_dir=MODEL_DIR,
+    )
+    model.to(device)
+    model.eval()
+    clip_model = _apply_backend("clip", model)
+    # Text features are computed on first use (warmup does it), not here:
+    # the inference server loads models in a parent that must not run
+    # forward passes before it forks.
+    _clip_text_features.clear()
+
+def _unload_clip() -> None:
     global clip_processor, clip_model
+    clip_processor, clip_model = None, None
+    _clip_text_features.clear()
+
+def _load_vit() -> None:
     global vit_processor, vit_model, vit_backbone
 
+    vit_processor = ViTImageProcessor.from_pretrained(
+        VIT_MODEL_NAME,
+        cache_dir=MODEL_DIR,
+    )
+    model = ViTForImageClassification.from_pretrained(
+        VIT_MODEL_NAME,
+        cache_dir=MODEL_DIR,
+    )
+    model.to(device)
+    model.eval()
+    vit_model = _apply_backend("vit", model)
+    # The classifier's encoder is the embedding backbone; sharing it avoids
+    # loading the same checkpoint twice.
+    vit_backbone = vit_model.vit
+
+def _unload_vit() -> None:
+    global vit_processor, vit_model, vit_backbone
+    vit_processor, vit_model, vit_backbone = None, None, None
+
+def _apply_backend(name: str, model: torch.nn.Module) -> torch.nn.Module:
+    backend = MODEL_BACKENDS[name]
+    if backend not in INFERENCE_BACKENDS:
+        raise MLServiceError(f"Unknown inference backend for {name}: {backend}")
+
+    if backend == "int8":
+        if device.type != "cpu":
+            raise MLServiceError("int8 dynamic quantization is only supported on CPU")
+        return torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    if backend == "bf16":
+        return model.to(torch.bfloat16)
+    return model
+
+def _model_dtype(model: torch.nn.Module) -> torch.dtype:
+    for param in model.parameters():
+        if param.is_floating_point():
+            return param.dtype
+    return torch.float32
+
+def _to_model_inputs(inputs, model: torch.nn.Module) -> dict:
+    dtype = _model_dtype(model)
+    return {
+        k: v.to(device, dtype=dtype) if v.is_floating_point() else v.to(device)
+        for k, v in inputs.items()
+    }
+
+def set_model_backend(name: str, backend: str) -> None:
+    """Switch a model's backend; it is reloaded with it on next use."""
+    if backend not in INFERENCE_BACKENDS:
+        raise MLServiceError(f"Unknown inference backend: {backend}")
+
+    MODEL_BACKENDS[name] = backend
+    unload_model(name)
+
+_MODEL_LOADERS = {
+    "blip": (_load_blip, _unload_blip, lambda: blip_model),
+    "clip": (_load_clip, _unload_clip, lambda: clip_model),
+    "vit": (_load_vit, _unload_vit, lambda: vit_model),
+}
+
+def is_model_enabled(name: str) -> bool:
+    return name in ENABLED_MODELS
+
+def load_model(name: str) -> None:
+    if name not in _MODEL_LOADERS:
+        raise MLServiceError(f"Unknown model: {name}")
+    if not is_model_enabled(name):
+        raise MLServiceError(f"The {name} model is disabled")
+
+    loader, _, current = _MODEL_LOADERS[name]
+    _last_used[name] = time.monotonic()
+    if current() is not None:
+        return
+
+    with _load_locks[name]:
+        if current() is not None:
+            return
+
+        status = model_status[name]
+        status.update(status="loading", error=None)
+        started = time.perf_counter()
+        try:
+            loader()
+        except Exception as e:
+            status.update(status="failed", error=str(e))
+            raise MLServiceError(f"Failed to load {name} model: {str(e)}")
+
+        status.update(status="loaded", load_seconds=round(time.perf_counter() - started, 3))
+
+    _start_idle_reaper()
+
+def load_models(names: Optional[Sequence[str]] = None) -> None:
+    for name in ENABLED_MODELS if names is None else names:
+        load_model(name)
+
+@contextmanager
+def using_models(*names: str) -> Iterator[None]:
+    """Load the named models and keep them from being unloaded while in use."""
+    for name in names:
+        with _load_locks[name]:
+            _in_use[name] += 1
     try:
-        if blip_model is None:
-            blip_processor = BlipProcessor.from_pretrained(
-                "Salesforce/blip-image-captioning-base",
-                cache_dir=MODEL_DIR,
-            )
-            blip_model = BlipForConditionalGeneration.from_pretrained(
-                "Salesforce/blip-image-captioning-base",
-                cache_dir=MODEL_DIR,
-            )
-            blip_model.to(device)
-
-        if clip_model is None:
-            clip_processor = CLIPProcessor.from_pretrained(
-                "openai/clip-vit-base-patch32",
-                cache_dir=MODEL_DIR,
-            )
-            clip_model = CLIPModel.from_pretrained(
-                "openai/clip-vit-base-patch32",
-                cache_dir=MODEL_DIR,
-            )
-            clip_model.to(device)
-
-        if vit_model is None:
-            vit_processor = ViTImageProcessor.from_pretrained(
-                "google/vit-base-patch16-224",
-                cache_dir=MODEL_DIR,
-            )
-            vit_model = ViTForImageClassification.from_pretrained(
-                "google/vit-base-patch16-224",
-                cache_dir=MODEL_DIR,
-            )
-            vit_model.to(device)
-
-        if vit_backbone is None:
-            vit_backbone = ViTModel.from_pretrained(
-                "google/vit-base-patch16-224",
-                cache_dir=MODEL_DIR,
-                output_hidden_states=True,
-            )
-            vit_backbone.to(device)
-            vit_backbone.eval()
-
-    except Exception as e:
-        raise MLServiceError(f"Failed to load models: {str(e)}")
+        for name in names:
+            load_model(name)
+        yield
+    finally:
+        for name in names:
+            with _load_locks[name]:
+                _in_use[name] -= 1
+                _last_used[name] = time.monotonic()
+
+def unload_model(name: str) -> bool:
+    _, unloader, current = _MODEL_LOADERS[name]
+    with _load_locks[name]:
+        if current() is None or _in_use[name] > 0:
+            return False
+        unloader()
+        model_status[name].update(status="unloaded", load_seconds=None)
+
+    gc.collect()
+    return True
+
+def unload_idle_models(ttl: float = MODEL_IDLE_TTL) -> List[str]:
+    now = time.monotonic()
+    unloaded = []
+    for name in MODEL_NAMES:
+        if name in PRELOAD_MODELS:
+            continue
+        if now - _last_used[name] >= ttl and unload_model(name):
+            unloaded.append(name)
+    return unloaded
+
+def _reap_idle_models() -> None:
+    interval = min(max(MODEL_IDLE_TTL / 2, 1.0), 60.0)
+    while True:
+        time.sleep(interval)
+        unload_idle_models()
+
+def _start_idle_reaper() -> None:
+    global _reaper
+
+    if MODEL_IDLE_TTL <= 0 or (_reaper is not None and _reaper.is_alive()):
+        return
+
+    _reaper = threading.Thread(target=_reap_idle_models, name="model-reaper", daemon=True)
+    _reaper.start()
+
+def warmup_model(name: str) -> None:
+    """Run one forward pass on a synthetic image so the first request is hot."""
+    image = Image.new("RGB", (224, 224), color=(127, 127, 127))
+
+    with using_models(name):
+        status = model_status[name]
+        status["status"] = "warming"
+        try:
+            if name == "blip":
+                _caption_images([image])
+            elif name == "clip":
+                _clip_tags([image], top_k=1)
+            else:
+                _vit_tags_and_embeddings([image], top_k=1)
+        except Exception as e:
+            status.update(status="failed", error=str(e))
+            raise MLServiceError(f"Failed to warm up {name} model: {str(e)}")
+
+        status["status"] = "ready"
+
+def preload_models(names: Optional[Sequence[str]] = None) -> None:
+    names = list(names if names is not None else PRELOAD_MODELS)
+    if not names:
+        return
+
+    with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="model-load") as pool:
+        futures = [pool.submit(warmup_model, name) for name in names]
+        for future in futures:
+            try:
+                future.result()
+            except MLServiceError:
+                # Recorded in model_status; readiness reports it.
+                continue
+
+def models_ready(names: Optional[Sequence[str]] = None) -> bool:
+    names = names if names is not None else PRELOAD_MODELS
+    return all(model_status[name]["status"] == "ready" for name in names)
 
 def clean_vit_label(label: str) -> str:
     label = label.replace("_", " ")
@@ -102,142 +364,404 @@ def clean_vit_label(label: str) -> str:
 
     return label
 
-def generate_caption(image_path: str) -> str:
+def _clip_text_cache_path(categories: Tuple[str, ...]) -> str:
+    assert clip_model is not None
+
+    revision = getattr(clip_model.config, "_commit_hash", None) or "unknown"
+    key = json.dumps({
+        "model": CLIP_MODEL_NAME,
+        "revision": revision,
+        "backend": MODEL_BACKENDS["clip"],
+        "categories": categories,
+    })
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return os.path.join(CLIP_TEXT_CACHE_DIR, f"{digest}.pt")
+
+def get_clip_text_features(
+    categories: Optional[Sequence[str]] = None,
+) -> torch.Tensor:
+    assert clip_processor is not None
+    assert clip_model is not None
+
+    key = tuple(categories or CLIP_CATEGORIES)
+    cached = _clip_text_features.get(key)
+    if cached is not None:
+        return cached
+
+    cache_path = _clip_text_cache_path(key)
+    if os.path.exists(cache_path):
+        try:
+            features = torch.load(cache_path, map_location=device)
+            _clip_text_features[key] = features
+            return features
+        except Exception:
+            pass
+
+    inputs = clip_processor(text=list(key), return_tensors="pt", padding=True)
+    inputs = _to_model_inputs(inputs, clip_model)
+
+    with torch.no_grad():
+        features = clip_model.get_text_features(**inputs)
+        features = torch.nn.functional.normalize(features, dim=-1)
+
+    _clip_text_features[key] = features
+
     try:
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"Image file not found: {image_path}")
+        os.makedirs(CLIP_TEXT_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        torch.save(features.cpu(), tmp_path)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+
+    return features
+
+def model_revision() -> str:
+    """Identifies the models and vocabulary that produced an analysis result."""
+    key = json.dumps({
+        "blip": BLIP_MODEL_NAME,
+        "clip": CLIP_MODEL_NAME,
+        "vit": VIT_MODEL_NAME,
+        "backends": MODEL_BACKENDS,
+        "categories": CLIP_CATEGORIES,
+    })
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+def set_clip_categories(categories: Sequence[str]) -> None:
+    global CLIP_CATEGORIES
+
+    categories = [c.strip() for c in categories if c and c.strip()]
+    if not categories:
+        raise ValueError("CLIP categories cannot be empty")
+
+    CLIP_CATEGORIES = categories
+    if clip_model is not None:
+        get_clip_text_features(CLIP_CATEGORIES)
+
+def _tensor_to_image(tensor: torch.Tensor) -> Image.Image:
+    if tensor.dim() != 3:
+        raise ValueError("Image tensors must have shape (C, H, W)")
+
+    tensor = tensor.detach().cpu()
+    if tensor.is_floating_point():
+        tensor = (tensor.clamp(0, 1) * 255).round()
+    array = tensor.to(torch.uint8).permute(1, 2, 0).numpy()
+    if array.shape[2] == 1:
+        array = array[:, :, 0]
+
+    return Image.fromarray(array).convert("RGB")
+
+def load_image(image: ImageInput) -> Image.Image:
+    if isinstance(image, Image.Image):
+        return image if image.mode == "RGB" else image.convert("RGB")
+
+    if isinstance(image, torch.Tensor):
+        return _tensor_to_image(image)
+
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        image = io.BytesIO(image)
+    elif isinstance(image, (str, os.PathLike)):
+        if not os.path.exists(image):
+            raise FileNotFoundError(f"Image file not found: {image}")
+    elif hasattr(image, "seek") and hasattr(image, "seekable") and image.seekable():
+        image.seek(0)
+
+    with Image.open(image) as img:
+        return img.convert("RGB")
+
+def iter_batches(
+    items: Sequence, max_batch_size: Optional[int] = None
+) -> Iterator[Sequence]:
+    size = max(1, max_batch_size or MAX_BATCH_SIZE)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _caption_images(pil_images: List[Image.Image]) -> List[str]:
+    assert blip_processor is not None
+    assert blip_model is not None
+
+    # BLIP resizes every image to a fixed resolution, so a batch
+    # stacks into one tensor without padding.
+    inputs = cast(
+        BatchEncoding,
+        blip_processor(images=pil_images, return_tensors="pt"),
+    )
+    inputs = _to_model_inputs(inputs, blip_model)
+
+    with torch.no_grad():
+        output_ids = blip_model.generate(**inputs, max_length=50)
 
-        load_models()
+    return blip_processor.batch_decode(output_ids, skip_special_tokens=True)
 
-        assert blip_processor is not None
-        assert blip_model is not None
+def _clip_tags(
+    pil_images: List[Image.Image],
+    top_k: int,
+    categories: Optional[Sequence[str]] = None,
+) -> List[List[str]]:
+    assert clip_processor is not None
+    assert clip_model is not None
 
-        image = Image.open(image_path).convert("RGB")
+    categories = list(categories or CLIP_CATEGORIES)
+    text_features = get_clip_text_features(categories)
 
-        inputs = cast(
-            BatchEncoding,
-            blip_processor(images=image, return_tensors="pt"),
-        )
-        inputs = {k: v.to(device) for k, v in inputs.items()}
+    inputs = clip_processor(images=pil_images, return_tensors="pt")
+    pixel_values = _to_model_inputs(inputs, clip_model)["pixel_values"]
 
-        output_ids = blip_model.generate(**inputs, max_length=50)
-        caption = blip_processor.decode(
-            output_ids[0], skip_special_tokens=True
-        )
+    with torch.no_grad():
+        image_features = clip_model.get_image_features(pixel_values=pixel_values)
+        image_features = torch.nn.functional.normalize(image_features, dim=-1)
+        logits = clip_model.logit_scale.exp() * image_features @ text_features.T
+        probs = torch.softmax(logits.float(), dim=-1)
 
-        return caption
+    top_indices = torch.argsort(probs, dim=-1, descending=True)[:, :top_k]
+    return [[categories[idx.item()] for idx in row] for row in top_indices]
 
-    except FileNotFoundError:
-        raise
-    except Exception as e:
-        raise MLServiceError(f"Failed to generate caption: {str(e)}")
+def _vit_tags_from_logits(logits: torch.Tensor, top_k: int) -> List[List[str]]:
+    assert vit_model is not None
 
-def predict_tags_vit(image_path: str, top_k: int = 2) -> List[str]:
-    try:
-        load_models()
+    probs = torch.softmax(logits.float(), dim=-1)
+    top_indices = torch.argsort(probs, dim=-1, descending=True)[:, :top_k]
 
-        assert vit_processor is not None
-        assert vit_model is not None
+    return [
+        [clean_vit_label(vit_model.config.id2label[idx.item()]) for idx in row]
+        for row in top_indices
+    ]
 
-        image = Image.open(image_path).convert("RGB")
+def _embedding_from_hidden_states(hidden_states) -> List[List[float]]:
+    penultimate = hidden_states[-2]
+    cls_embedding = penultimate[:, 0, :]
+    normalized = torch.nn.functional.normalize(cls_embedding.float(), dim=1)
+    return normalized.cpu().tolist()
 
-        inputs = vit_processor(images=image, return_tensors="pt")
-        inputs = {k: v.to(device) for k, v in inputs.items()}
+def _vit_inputs(pil_images: List[Image.Image]) -> dict:
+    assert vit_processor is not None
+    assert vit_model is not None
 
-        with torch.no_grad():
-            outputs = vit_model(**inputs)
-            logits = outputs.logits
-            probs = torch.softmax(logits, dim=-1)[0]
+    inputs = vit_processor(images=pil_images, return_tensors="pt")
+    return _to_model_inputs(inputs, vit_model)
 
-        top_indices = torch.argsort(probs, descending=True)[:top_k]
+def _vit_tags(pil_images: List[Image.Image], top_k: int) -> List[List[str]]:
+    assert vit_model is not None
 
-        tags = []
-        for idx in top_indices:
-            label = vit_model.config.id2label[idx.item()]
-            cleaned_label = clean_vit_label(label)
-            tags.append(cleaned_label)
+    with torch.no_grad():
+        outputs = vit_model(**_vit_inputs(pil_images))
 
-        return tags
-    except Exception as e:
-        raise MLServiceError(f"Failed to predict ViT tags: {str(e)}")
+    return _vit_tags_from_logits(outputs.logits, top_k)
 
-def predict_tags_clip(image_path: str, top_k: int = 2) -> List[str]:
-    try:
-        load_models()
+def _vit_embeddings(pil_images: List[Image.Image]) -> List[List[float]]:
+    assert vit_backbone is not None
 
-        assert clip_processor is not None
-        assert clip_model is not None
+    with torch.no_grad():
+        outputs = vit_backbone(**_vit_inputs(pil_images), output_hidden_states=True)
 
-        image = Image.open(image_path).convert("RGB")
+    return _embedding_from_hidden_states(outputs.hidden_states)
 
-        inputs = cast(
-            BatchEncoding,
-            clip_processor(
-                text=CLIP_CATEGORIES,
-                images=image,
-                return_tensors="pt",
-                padding=True,
-            ),
-        )
-        inputs = {k: v.to(device) for k, v in inputs.items()}
+def _vit_tags_and_embeddings(pil_images: List[Image.Image], top_k: int):
+    assert vit_model is not None
 
-        with torch.no_grad():
-            outputs = clip_model(**inputs)
-            logits = outputs.logits_per_image[0]
-            probs = torch.softmax(logits, dim=0)
+    # vit_backbone is the classifier's own encoder, so a single forward
+    # pass yields both the logits and the penultimate hidden state.
+    with torch.no_grad():
+        outputs = vit_model(**_vit_inputs(pil_images), output_hidden_states=True)
 
-        top_indices = torch.argsort(probs, descending=True)[:top_k]
-        return [CLIP_CATEGORIES[i] for i in top_indices]
-    except Exception as e:
-        raise MLServiceError(f"Failed to predict CLIP tags: {str(e)}")
+    tags = _vit_tags_from_logits(outputs.logits, top_k)
+    embeddings = _embedding_from_hidden_states(outputs.hidden_states)
+    return tags, embeddings
 
-def predict_tags(image_path: str) -> List[str]:
+def generate_caption_batch(
+    images: Sequence[ImageInput], max_batch_size: Optional[int] = None
+) -> List[str]:
     try:
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"Image file not found: {image_path}")
-
-        clip_tags = predict_tags_clip(image_path, top_k=2)
-        vit_tags = predict_tags_vit(image_path, top_k=2)
+        captions: List[str] = []
+        with using_models("blip"):
+            for batch in iter_batches(images, max_batch_size):
+                captions.extend(_caption_images([load_image(image) for image in batch]))
 
-        combined_tags = clip_tags + vit_tags
+        return captions
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        raise MLServiceError(f"Failed to generate captions: {str(e)}")
 
-        seen = set()
-        unique_tags = []
-        for tag in combined_tags:
-            tag_lower = tag.lower()
-            if tag_lower not in seen:
-                seen.add(tag_lower)
-                unique_tags.append(tag)
+def predict_tags_vit_batch(
+    images: Sequence[ImageInput],
+    top_k: int = 2,
+    max_batch_size: Optional[int] = None,
+) -> List[List[str]]:
+    try:
+        results: List[List[str]] = []
+        with using_models("vit"):
+            for batch in iter_batches(images, max_batch_size):
+                results.extend(_vit_tags([load_image(image) for image in batch], top_k))
 
-        return unique_tags
+        return results
     except FileNotFoundError:
         raise
     except Exception as e:
-        raise MLServiceError(f"Failed to predict tags: {str(e)}")
+        raise MLServiceError(f"Failed to predict ViT tags: {str(e)}")
 
-def extract_vit_embedding(image_path: str) -> List[float]:
+def predict_tags_clip_batch(
+    images: Sequence[ImageInput],
+    top_k: int = 2,
+    max_batch_size: Optional[int] = None,
+    categories: Optional[Sequence[str]] = None,
+) -> List[List[str]]:
     try:
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"Image file not found: {image_path}")
+        results: List[List[str]] = []
+        with using_models("clip"):
+            for batch in iter_batches(images, max_batch_size):
+                pil_images = [load_image(image) for image in batch]
+                results.extend(_clip_tags(pil_images, top_k, categories))
 
-        load_models()
+        return results
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        raise MLServiceError(f"Failed to predict CLIP tags: {str(e)}")
+
+def merge_tags(*tag_lists: List[str]) -> List[str]:
+    seen = set()
+    unique_tags = []
+    for tags in tag_lists:
+        for tag in tags:
+            tag_lower = tag.lower()
+            if tag_lower not in seen:
+                seen.add(tag_lower)
+                unique_tags.append(tag)
 
-        assert vit_processor is not None
-        assert vit_backbone is not None
+    return unique_tags
 
-        image = Image.open(image_path).convert("RGB")
-        inputs = vit_processor(images=image, return_tensors="pt")
-        inputs = {k: v.to(device) for k, v in inputs.items()}
+def predict_tags_batch(
+    images: Sequence[ImageInput], max_batch_size: Optional[int] = None
+) -> List[List[str]]:
+    results = analyze_image_batch(
+        images, caption=False, embedding=False, max_batch_size=max_batch_size
+    )
+    return [result.get("tags", []) for result in results]
 
-        with torch.no_grad():
-            outputs = vit_backbone(**inputs)
+def extract_vit_embedding_batch(
+    images: Sequence[ImageInput], max_batch_size: Optional[int] = None
+) -> List[List[float]]:
+    try:
+        embeddings: List[List[float]] = []
+        with using_models("vit"):
+            for batch in iter_batches(images, max_batch_size):
+                embeddings.extend(_vit_embeddings([load_image(image) for image in batch]))
 
-        penultimate = outputs.hidden_states[-2]
-        cls_embedding = penultimate[:, 0, :]
-        embedding = torch.nn.functional.normalize(cls_embedding, dim=1)
+        return embeddings
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        raise MLServiceError(f"Failed to extract ViT embeddings: {str(e)}")
+
+def analyze_image_batch(
+    images: Sequence[ImageInput],
+    caption: bool = True,
+    tags: bool = True,
+    embedding: bool = True,
+    top_k: int = 2,
+    max_batch_size: Optional[int] = None,
+    categories: Optional[Sequence[str]] = None,
+) -> List[dict]:
+    """Run every requested analysis over the images, decoding each once.
+
+    Parts whose model is disabled are left out of the results instead of
+    failing the whole analysis; tags then come from whichever of CLIP and
+    ViT is enabled.
+    """
+    caption = caption and is_model_enabled("blip")
+    clip = tags and is_model_enabled("clip")
+    vit_tags_wanted = tags and is_model_enabled("vit")
+    embedding = embedding and is_model_enabled("vit")
+
+    needed = [
+        name for name, wanted in (
+            ("blip", caption),
+            ("clip", clip),
+            ("vit", vit_tags_wanted or embedding),
+        ) if wanted
+    ]
 
-        return embedding.squeeze(0).cpu().tolist()
+    try:
+        results: List[dict] = []
+        with using_models(*needed):
+            for batch in iter_batches(images, max_batch_size):
+                pil_images = [load_image(image) for image in batch]
+                batch_results: List[dict] = [{} for _ in pil_images]
+
+                if caption:
+                    for result, text in zip(batch_results, _caption_images(pil_images)):
+                        result["caption"] = text
+
+                if clip:
+                    clip_tags = _clip_tags(pil_images, top_k, categories)
+                    for result, image_tags in zip(batch_results, clip_tags):
+                        result["clip_tags"] = image_tags
+
+                if vit_tags_wanted and embedding:
+                    vit_tags, embeddings = _vit_tags_and_embeddings(pil_images, top_k)
+                elif vit_tags_wanted:
+                    vit_tags, embeddings = _vit_tags(pil_images, top_k), None
+                elif embedding:
+                    vit_tags, embeddings = None, _vit_embeddings(pil_images)
+                else:
+                    vit_tags, embeddings = None, None
+
+                for i, result in enumerate(batch_results):
+                    if vit_tags is not None:
+                        result["vit_tags"] = vit_tags[i]
+                    if embeddings is not None:
+                        result["embedding"] = embeddings[i]
+                    if tags:
+                        result["tags"] = merge_tags(
+                            result.get("clip_tags", []), result.get("vit_tags", [])
+                        )
+
+                results.extend(batch_results)
+
+        return results
     except FileNotFoundError:
         raise
     except Exception as e:
-        raise MLServiceError(f"Failed to extract ViT embedding: {str(e)}")
+        raise MLServiceError(f"Failed to analyze images: {str(e)}")
+
+def analyze_image(
+    image: ImageInput,
+    caption: bool = True,
+    tags: bool = True,
+    embedding: bool = True,
+) -> dict:
+    return analyze_image_batch(
+        [image], caption=caption, tags=tags, embedding=embedding
+    )[0]
+
+def generate_caption(image_path: ImageInput) -> str:
+    return generate_caption_batch([image_path])[0]
+
+def predict_tags_vit(image_path: ImageInput, top_k: int = 2) -> List[str]:
+    try:
+        return predict_tags_vit_batch([image_path], top_k=top_k)[0]
+    except MLServiceError:
+        raise
+    except Exception as e:
+        raise MLServiceError(f"Failed to predict ViT tags: {str(e)}")
+
+def predict_tags_clip(
+    image_path: ImageInput,
+    top_k: int = 2,
+    categories: Optional[Sequence[str]] = None,
+) -> List[str]:
+    try:
+        return predict_tags_clip_batch(
+            [image_path], top_k=top_k, categories=categories
+        )[0]
+    except MLServiceError:
+        raise
+    except Exception as e:
+        raise MLServiceError(f"Failed to predict CLIP tags: {str(e)}")
+
+def predict_tags(image_path: ImageInput) -> List[str]:
+    return predict_tags_batch([image_path])[0]
+
+def extract_vit_embedding(image_path: ImageInput) -> List[float]:
+    return extract_vit_embedding_batch([image_path])[0]
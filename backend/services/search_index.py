@@ -0,0 +1,195 @@
+import asyncio
+import bisect
+import math
+import os
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from services.index_sync import IndexSync
+
+BM25_K1 = float(os.getenv("SEARCH_BM25_K1", "1.2"))
+BM25_B = float(os.getenv("SEARCH_BM25_B", "0.75"))
+MAX_PREFIX_EXPANSIONS = int(os.getenv("SEARCH_MAX_PREFIX_EXPANSIONS", "50"))
+
+# Title and tag matches count for more than a word buried in a caption.
+FIELD_WEIGHTS = {"title": 2, "ai_generated_caption": 1, "tags": 2}
+
+def _is_token_char(char: str) -> bool:
+    # Combining marks count as word characters: without them \w+ splits
+    # scripts such as Devanagari in the middle of a word.
+    return char.isalnum() or unicodedata.category(char)[0] == "M"
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+
+    tokens = []
+    current: List[str] = []
+    for char in unicodedata.normalize("NFKC", text).casefold():
+        if _is_token_char(char):
+            current.append(char)
+        elif current:
+            tokens.append("".join(current))
+            current = []
+    if current:
+        tokens.append("".join(current))
+    return tokens
+
+
+def document_terms(doc: dict) -> Counter:
+    terms: Counter = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        value = doc.get(field)
+        if not value:
+            continue
+        texts = value if isinstance(value, list) else [value]
+        for text in texts:
+            for token in tokenize(text):
+                terms[token] += weight
+    return terms
+
+
+class SearchIndex:
+    """Inverted index over image titles, captions and tags ranked with BM25."""
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, Counter] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self._sorted_terms: List[str] = []
+        self._terms_dirty = False
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def add(self, doc_id: str, doc: dict) -> None:
+        self.remove(doc_id)
+
+        terms = document_terms(doc)
+        if not terms:
+            return
+
+        for term, frequency in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._terms_dirty = True
+            postings[doc_id] = frequency
+
+        length = sum(terms.values())
+        self._doc_terms[doc_id] = terms
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+
+    def remove(self, doc_id: str) -> None:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                self._terms_dirty = True
+
+        self._total_length -= self._doc_lengths.pop(doc_id, 0)
+
+    def _expand(self, token: str, prefix: bool) -> List[str]:
+        if not prefix:
+            return [token] if token in self._postings else []
+
+        if self._terms_dirty:
+            self._sorted_terms = sorted(self._postings)
+            self._terms_dirty = False
+
+        matches = []
+        start = bisect.bisect_left(self._sorted_terms, token)
+        for term in self._sorted_terms[start:]:
+            if not term.startswith(token) or len(matches) >= MAX_PREFIX_EXPANSIONS:
+                break
+            matches.append(term)
+        return matches
+
+    def _idf(self, term: str) -> float:
+        n = len(self._doc_terms)
+        df = len(self._postings.get(term, ()))
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(
+        self,
+        query: str,
+        offset: int = 0,
+        limit: int = 20,
+        prefix: bool = True,
+    ) -> Tuple[List[Tuple[str, float]], int]:
+        tokens = tokenize(query)
+        if not tokens or not self._doc_terms:
+            return [], 0
+
+        avg_length = self._total_length / len(self._doc_terms)
+        scores: Optional[Dict[str, float]] = None
+
+        # Every query token has to match (exactly or by prefix), so
+        # candidate sets are intersected token by token.
+        for token in dict.fromkeys(tokens):
+            token_scores: Dict[str, float] = {}
+            for term in self._expand(token, prefix):
+                idf = self._idf(term)
+                for doc_id, frequency in self._postings[term].items():
+                    length = self._doc_lengths[doc_id]
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                    score = idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                    if score > token_scores.get(doc_id, 0.0):
+                        token_scores[doc_id] = score
+
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {
+                    doc_id: score + token_scores[doc_id]
+                    for doc_id, score in scores.items()
+                    if doc_id in token_scores
+                }
+
+            if not scores:
+                return [], 0
+
+        assert scores is not None
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[offset:offset + limit], len(ranked)
+
+
+search_index = SearchIndex()
+_sync = IndexSync(
+    {"title": 1, "ai_generated_caption": 1, "tags": 1},
+    lambda doc: search_index.add(str(doc["_id"]), doc),
+    search_index.remove,
+)
+_load_lock = asyncio.Lock()
+
+
+async def get_search_index() -> SearchIndex:
+    if not _sync.loaded:
+        async with _load_lock:
+            if not _sync.loaded:
+                await _sync.load()
+    else:
+        await _sync.refresh()
+
+    return search_index
+
+
+async def index_image_text(doc: dict) -> None:
+    await get_search_index()
+    _sync.apply(doc)
+
+
+async def unindex_image_text(image_id: str) -> None:
+    await get_search_index()
+    _sync.discard(image_id)
@@ -0,0 +1,74 @@
+import asyncio
+import os
+from typing import Awaitable, Callable, Optional
+
+from pymongo import ReturnDocument
+
+from database import admin_collection, counters_collection
+
+ADMIN_ID_BLOCK_SIZE = int(os.getenv("ADMIN_ID_BLOCK_SIZE", "1"))
+
+
+class SequenceAllocator:
+    """Hands out increasing integer ids from a document in the counters collection.
+
+    Each allocation is a single atomic find_one_and_update with $inc, so
+    concurrent workers never receive the same id. With block_size > 1 a
+    process reserves that many ids per round trip and serves them from
+    memory; ids left in a block when the process exits are skipped.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        block_size: int = 1,
+        seed: Optional[Callable[[], Awaitable[int]]] = None,
+    ):
+        self.name = name
+        self.block_size = max(1, block_size)
+        self._seed = seed
+        self._seeded = False
+        self._next = 0
+        self._end = 0
+        self._lock = asyncio.Lock()
+
+    async def _ensure_seeded(self):
+        if self._seeded:
+            return
+        if self._seed is not None:
+            # $max only raises the counter, so concurrent or repeated seeding is safe.
+            await counters_collection.update_one(
+                {"_id": self.name},
+                {"$max": {"value": await self._seed()}},
+                upsert=True,
+            )
+        self._seeded = True
+
+    async def _reserve_block(self):
+        counter = await counters_collection.find_one_and_update(
+            {"_id": self.name},
+            {"$inc": {"value": self.block_size}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        self._end = counter["value"] + 1
+        self._next = self._end - self.block_size
+
+    async def next_id(self) -> int:
+        async with self._lock:
+            await self._ensure_seeded()
+            if self._next >= self._end:
+                await self._reserve_block()
+            value = self._next
+            self._next += 1
+            return value
+
+
+async def _max_admin_id() -> int:
+    last_admin = await admin_collection.find_one(
+        {}, projection={"admin_id": 1}, sort=[("admin_id", -1)]
+    )
+    return last_admin["admin_id"] if last_admin else 0
+
+
+admin_id_sequence = SequenceAllocator("admin_id", ADMIN_ID_BLOCK_SIZE, seed=_max_admin_id)
@@ -0,0 +1,94 @@
+import os
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+TAG_WEIGHT = float(os.getenv("SIMILAR_TAG_WEIGHT", "0.7"))
+EMBEDDING_WEIGHT = float(os.getenv("SIMILAR_EMBEDDING_WEIGHT", "0.3"))
+
+
+class TagBitsets:
+    """Row-aligned tag sets packed into uint64 bitsets.
+
+    Each distinct tag gets a bit position the first time it is stored, so
+    Jaccard similarity against every row is a popcount over the matrix.
+    """
+
+    def __init__(self, rows: int = 0):
+        self.vocabulary: Dict[str, int] = {}
+        self.bits = np.zeros((rows, 1), dtype=np.uint64)
+        self.counts = np.zeros(rows, dtype=np.int32)
+
+    def _ensure_words(self, words: int) -> None:
+        current = self.bits.shape[1]
+        if words <= current:
+            return
+        bits = np.zeros((self.bits.shape[0], max(words, current * 2)), dtype=np.uint64)
+        bits[:, :current] = self.bits
+        self.bits = bits
+
+    def resize(self, rows: int) -> None:
+        current = self.bits.shape[0]
+        bits = np.zeros((rows, self.bits.shape[1]), dtype=np.uint64)
+        counts = np.zeros(rows, dtype=np.int32)
+        keep = min(rows, current)
+        bits[:keep] = self.bits[:keep]
+        counts[:keep] = self.counts[:keep]
+        self.bits = bits
+        self.counts = counts
+
+    def select(self, rows: np.ndarray) -> None:
+        self.bits = self.bits[rows].copy()
+        self.counts = self.counts[rows].copy()
+
+    def encode(self, tags: Optional[Iterable[str]], grow: bool = False) -> np.ndarray:
+        row = np.zeros(self.bits.shape[1], dtype=np.uint64)
+        for tag in set(tags or []):
+            position = self.vocabulary.get(tag)
+            if position is None:
+                if not grow:
+                    continue
+                position = len(self.vocabulary)
+                self.vocabulary[tag] = position
+                self._ensure_words(position // 64 + 1)
+                if row.shape[0] < self.bits.shape[1]:
+                    row = np.pad(row, (0, self.bits.shape[1] - row.shape[0]))
+            row[position // 64] |= np.uint64(1) << np.uint64(position % 64)
+        return row
+
+    def set_row(self, row: int, tags: Optional[Iterable[str]]) -> None:
+        tag_set = set(tags or [])
+        self.bits[row] = self.encode(tag_set, grow=True)
+        self.counts[row] = len(tag_set)
+
+    def clear_row(self, row: int) -> None:
+        self.bits[row] = 0
+        self.counts[row] = 0
+
+
+def hybrid_scores(
+    query_vector: np.ndarray,
+    query_bits: np.ndarray,
+    query_tag_count: int,
+    vectors: np.ndarray,
+    bits: np.ndarray,
+    counts: np.ndarray,
+    tag_weight: float = TAG_WEIGHT,
+    embedding_weight: float = EMBEDDING_WEIGHT,
+) -> np.ndarray:
+    embedding_sim = vectors @ query_vector
+
+    intersection = np.bitwise_count(bits & query_bits).sum(axis=1, dtype=np.int32)
+    union = counts + query_tag_count - intersection
+    tag_sim = intersection / np.maximum(union, 1)
+
+    return tag_weight * tag_sim + embedding_weight * embedding_sim
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.intp)
+
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
@@ -0,0 +1,90 @@
+import hashlib
+import os
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+
+UPLOAD_DIR = "uploads/images"
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_IMAGE_UPLOAD_SIZE = int(os.getenv("MAX_IMAGE_UPLOAD_SIZE", str(50 * 1024 * 1024)))
+
+
+class StoredUpload(BaseModel):
+    path: str
+    size: int
+    sha256: str
+
+
+def _too_large(max_size: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Max {max_size // (1024 * 1024)}MB"
+    )
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+async def save_upload(
+    file: UploadFile,
+    dest_path: str,
+    max_size: int = MAX_IMAGE_UPLOAD_SIZE,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> StoredUpload:
+    """Stream an upload to dest_path in chunks, hashing it on the way.
+
+    Writes go to a ".part" file off the event loop and are renamed into
+    place only once the whole body is within max_size.
+    """
+    if file.size is not None and file.size > max_size:
+        raise _too_large(max_size)
+
+    digest = hashlib.sha256()
+    size = 0
+    part_path = f"{dest_path}.part"
+
+    out = await run_in_threadpool(open, part_path, "wb")
+    try:
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+
+            size += len(chunk)
+            if size > max_size:
+                raise _too_large(max_size)
+
+            digest.update(chunk)
+            await run_in_threadpool(out.write, chunk)
+
+        await run_in_threadpool(out.close)
+        await run_in_threadpool(os.replace, part_path, dest_path)
+    except BaseException:
+        out.close()
+        _remove(part_path)
+        raise
+
+    return StoredUpload(path=dest_path, size=size, sha256=digest.hexdigest())
+
+
+def remove_upload(path: Optional[str]) -> None:
+    if path and os.path.exists(path):
+        _remove(path)
+
+
+def hash_file(fileobj, chunk_size: int = UPLOAD_CHUNK_SIZE) -> str:
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
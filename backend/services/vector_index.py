@@ -0,0 +1,320 @@
+import asyncio
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.embedding_codec import decode_embedding
+from services.index_sync import IndexSync
+from services.similarity import (
+    EMBEDDING_WEIGHT,
+    TAG_WEIGHT,
+    TagBitsets,
+    hybrid_scores,
+    top_k_indices,
+)
+
+EMBEDDING_DIM = 768
+INDEX_MODE = os.getenv("VECTOR_INDEX_MODE", "flat")
+IVF_NLIST = int(os.getenv("VECTOR_INDEX_IVF_NLIST", "64"))
+IVF_NPROBE = int(os.getenv("VECTOR_INDEX_IVF_NPROBE", "8"))
+# IVF only pays off once there are enough vectors to cluster.
+IVF_MIN_TRAIN_SIZE = int(os.getenv("VECTOR_INDEX_IVF_MIN_TRAIN_SIZE", "2048"))
+
+
+def normalize(vector: Optional[Sequence[float]], dim: int = EMBEDDING_DIM) -> np.ndarray:
+    if vector is None or len(vector) == 0:
+        return np.zeros(dim, dtype=np.float32)
+
+    array = np.asarray(vector, dtype=np.float32).reshape(-1)
+    norm = np.linalg.norm(array)
+    if norm > 0:
+        array = array / norm
+    return array
+
+
+class VectorIndex:
+    """Cosine-similarity index over unit-length float32 embeddings.
+
+    "flat" scans every row; "ivf" only scans the nprobe closest k-means
+    clusters once enough vectors have been added to train them. Rows
+    without an embedding are stored as zero vectors so they can still be
+    matched on tags.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM, mode: str = INDEX_MODE):
+        if mode not in ("flat", "ivf"):
+            raise ValueError(f"Unknown vector index mode: {mode}")
+
+        self.dim = dim
+        self.mode = mode
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._ids: List[Optional[str]] = []
+        # Owners are interned to int32 codes so owner filters are one
+        # vectorized comparison; -1 means no owner.
+        self._owner_codes = np.full(0, -1, dtype=np.int32)
+        self._owner_lookup: Dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._rows: Dict[str, int] = {}
+        self._size = 0
+
+        self._tags = TagBitsets()
+
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, image_id: str) -> bool:
+        return image_id in self._rows
+
+    def _grow(self, needed: int) -> None:
+        capacity = self._vectors.shape[0]
+        if needed <= capacity:
+            return
+
+        new_capacity = max(needed, capacity * 2, 64)
+        vectors = np.zeros((new_capacity, self.dim), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        self._vectors = vectors
+
+        alive = np.zeros(new_capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._alive = alive
+
+        assignments = np.full(new_capacity, -1, dtype=np.int32)
+        assignments[:self._size] = self._assignments[:self._size]
+        self._assignments = assignments
+
+        owner_codes = np.full(new_capacity, -1, dtype=np.int32)
+        owner_codes[:self._size] = self._owner_codes[:self._size]
+        self._owner_codes = owner_codes
+
+        self._tags.resize(new_capacity)
+
+    def add(
+        self,
+        image_id: str,
+        vector: Optional[Sequence[float]],
+        owner: Optional[str] = None,
+        tags: Optional[Sequence[str]] = None,
+    ) -> None:
+        array = normalize(vector, self.dim)
+        if array.shape[0] != self.dim:
+            raise ValueError(f"Expected a {self.dim}-d vector, got {array.shape[0]}")
+
+        if image_id in self._rows:
+            row = self._rows[image_id]
+        else:
+            self._grow(self._size + 1)
+            row = self._size
+            self._size += 1
+            self._ids.append(image_id)
+            self._rows[image_id] = row
+
+        self._vectors[row] = array
+        self._owner_codes[row] = self._owner_code(owner)
+        self._alive[row] = True
+        self._tags.set_row(row, tags)
+
+        if self._centroids is not None:
+            self._assignments[row] = int(np.argmax(self._centroids @ array))
+        elif self.mode == "ivf" and len(self._rows) >= IVF_MIN_TRAIN_SIZE:
+            self.train()
+
+    def _owner_code(self, owner: Optional[str]) -> int:
+        if owner is None:
+            return -1
+        code = self._owner_lookup.get(owner)
+        if code is None:
+            code = self._owner_lookup[owner] = len(self._owner_lookup)
+        return code
+
+    def remove(self, image_id: str) -> None:
+        row = self._rows.pop(image_id, None)
+        if row is None:
+            return
+
+        self._alive[row] = False
+        self._ids[row] = None
+        self._owner_codes[row] = -1
+        self._tags.clear_row(row)
+
+        if self._size > 64 and len(self._rows) < self._size // 2:
+            self.compact()
+
+    def compact(self) -> None:
+        rows = np.flatnonzero(self._alive[:self._size])
+
+        self._vectors = self._vectors[rows].copy()
+        self._alive = np.ones(len(rows), dtype=bool)
+        self._assignments = self._assignments[rows].copy()
+        self._owner_codes = self._owner_codes[rows].copy()
+        self._tags.select(rows)
+        self._ids = [self._ids[row] for row in rows]
+        self._rows = {image_id: i for i, image_id in enumerate(self._ids) if image_id}
+        self._size = len(rows)
+
+    def train(self, nlist: int = IVF_NLIST, iterations: int = 10) -> None:
+        rows = np.flatnonzero(self._alive[:self._size])
+        if len(rows) == 0:
+            self._centroids = None
+            return
+
+        data = self._vectors[rows]
+        nlist = min(nlist, len(rows))
+        rng = np.random.default_rng(0)
+        centroids = data[rng.choice(len(rows), size=nlist, replace=False)].copy()
+
+        # Spherical k-means: vectors are unit length, so the closest
+        # centroid is the one with the largest dot product.
+        for _ in range(iterations):
+            labels = np.argmax(data @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = data[labels == c]
+                if len(members):
+                    centroids[c] = normalize(members.sum(axis=0))
+
+        self._centroids = centroids
+        self._assignments[rows] = np.argmax(data @ centroids.T, axis=1)
+
+    def candidate_rows(
+        self,
+        query: np.ndarray,
+        owner: Optional[str] = None,
+        nprobe: int = IVF_NPROBE,
+        keep: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Rows worth scoring; `keep` marks rows IVF pruning must not drop."""
+        mask = self._alive[:self._size].copy()
+
+        if owner is not None:
+            code = self._owner_lookup.get(owner)
+            if code is None:
+                return np.zeros(0, dtype=np.intp)
+            mask &= self._owner_codes[:self._size] == code
+
+        if self._centroids is not None and query.any():
+            probe = np.argsort(self._centroids @ query)[::-1][:nprobe]
+            probed = np.isin(self._assignments[:self._size], probe)
+            if keep is not None:
+                probed |= keep
+            mask &= probed
+
+        return np.flatnonzero(mask)
+
+    def search(
+        self,
+        vector: Sequence[float],
+        k: int = 10,
+        owner: Optional[str] = None,
+        exclude: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        if not self._rows or k <= 0:
+            return []
+
+        query = normalize(vector)
+        rows = self.candidate_rows(query, owner)
+        if exclude is not None and exclude in self._rows:
+            rows = rows[rows != self._rows[exclude]]
+        if len(rows) == 0:
+            return []
+
+        scores = self._vectors[rows] @ query
+        top = top_k_indices(scores, k)
+
+        return [(self._ids[rows[i]], float(scores[i])) for i in top]
+
+    def hybrid_search(
+        self,
+        vector: Optional[Sequence[float]],
+        tags: Optional[Sequence[str]],
+        k: int = 10,
+        owner: Optional[str] = None,
+        exclude: Optional[str] = None,
+        tag_weight: float = TAG_WEIGHT,
+        embedding_weight: float = EMBEDDING_WEIGHT,
+    ) -> List[Tuple[str, float]]:
+        if not self._rows or k <= 0:
+            return []
+
+        query = normalize(vector, self.dim)
+        tag_set = set(tags or [])
+        query_bits = self._tags.encode(tag_set)
+
+        # Clusters only reflect the embedding part of the score, so rows
+        # sharing a tag with the query stay candidates whatever their cluster.
+        keep = None
+        if self._centroids is not None and tag_set:
+            keep = (self._tags.bits[:self._size] & query_bits).any(axis=1)
+
+        rows = self.candidate_rows(query, owner, keep=keep)
+        if exclude is not None and exclude in self._rows:
+            rows = rows[rows != self._rows[exclude]]
+        if len(rows) == 0:
+            return []
+
+        scores = hybrid_scores(
+            query,
+            query_bits,
+            len(tag_set),
+            self._vectors[rows],
+            self._tags.bits[rows],
+            self._tags.counts[rows],
+            tag_weight=tag_weight,
+            embedding_weight=embedding_weight,
+        )
+        top = top_k_indices(scores, k)
+
+        return [(self._ids[rows[i]], float(scores[i])) for i in top]
+
+    def get(self, image_id: str) -> Optional[np.ndarray]:
+        row = self._rows.get(image_id)
+        if row is None:
+            return None
+        return self._vectors[row]
+
+
+def _add_doc(index: VectorIndex, doc: dict) -> None:
+    index.add(
+        str(doc["_id"]),
+        decode_embedding(doc.get("embeddings")),
+        doc.get("admin_id"),
+        doc.get("tags"),
+    )
+
+
+def _apply_doc(doc: dict) -> None:
+    try:
+        _add_doc(image_index, doc)
+    except (TypeError, ValueError):
+        image_index.remove(str(doc["_id"]))
+
+
+image_index = VectorIndex()
+_sync = IndexSync({"embeddings": 1, "admin_id": 1, "tags": 1}, _apply_doc, image_index.remove)
+_load_lock = asyncio.Lock()
+
+
+async def get_image_index() -> VectorIndex:
+    if not _sync.loaded:
+        async with _load_lock:
+            if not _sync.loaded:
+                await _sync.load()
+                if image_index.mode == "ivf" and len(image_index) >= IVF_MIN_TRAIN_SIZE:
+                    image_index.train()
+    else:
+        await _sync.refresh()
+
+    return image_index
+
+
+async def index_image(doc: dict) -> None:
+    await get_image_index()
+    _sync.apply(doc)
+
+
+async def unindex_image(image_id: str) -> None:
+    await get_image_index()
+    _sync.discard(image_id)
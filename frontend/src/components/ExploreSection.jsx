@@ -7,9 +7,9 @@ function ExploreSection() {
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    photographersAPI.getAll()
+    photographersAPI.getAll({ limit: 8 })
       .then(res => {
-        setPhotographers(res.data.slice(0, 8));
+        setPhotographers(res.data);
         setLoading(false);
       })
       .catch(err => {
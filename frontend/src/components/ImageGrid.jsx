@@ -1,4 +1,5 @@
 import { useState } from 'react';
+import { getImageSrcSet } from '../utils/helpers';
 
 function ImageGrid({ images, onImageClick }) {
   return (
@@ -15,6 +16,9 @@ function ImageGrid({ images, onImageClick }) {
             <div className="relative overflow-hidden">
               <img
                 src={imageUrl}
+                srcSet={getImageSrcSet(image) || undefined}
+                sizes="(min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
+                loading="lazy"
                 alt={image.title || 'Image'}
                 className="w-full h-auto group-hover:scale-105 transition-transform duration-500"
               />
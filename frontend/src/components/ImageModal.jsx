@@ -1,6 +1,7 @@
 import { useEffect, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { imagesAPI } from '../services/api';
+import { getImageSrcSet } from '../utils/helpers';
 
 function ImageModal({ image, allImages, onClose, onImageChange }) {
   const navigate = useNavigate();
@@ -91,6 +92,9 @@ function ImageModal({ image, allImages, onClose, onImageChange }) {
                     >
                       <img
                         src={`http://127.0.0.1:8000${img.path}`}
+                        srcSet={getImageSrcSet(img) || undefined}
+                        sizes="300px"
+                        loading="lazy"
                         alt={img.title || 'Similar'}
                         className="w-full aspect-[4/3] object-cover group-hover:opacity-70 transition"
                       />
@@ -0,0 +1,15 @@
+function LoadMoreButton({ onClick, loading }) {
+  return (
+    <div className="text-center mt-12">
+      <button
+        onClick={onClick}
+        disabled={loading}
+        className="inline-block border border-gray-900 text-gray-900 px-8 py-3 rounded hover:bg-gray-900 hover:text-white transition disabled:opacity-50"
+      >
+        {loading ? 'Loading...' : 'Load More'}
+      </button>
+    </div>
+  );
+}
+
+export default LoadMoreButton;
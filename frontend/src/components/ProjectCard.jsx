@@ -7,7 +7,7 @@ function ProjectCard({ project }) {
   const [coverImage, setCoverImage] = useState('https://via.placeholder.com/600x400');
 
   useEffect(() => {
-    imagesAPI.getByProjectId(project._id)
+    imagesAPI.getPageByProjectId(project._id, { limit: 1 })
       .then(res => {
         if (res.data && res.data.length > 0 && res.data[0].metadata?.filename) {
           setCoverImage(`http://127.0.0.1:8000/uploads/images/${res.data[0].metadata.filename}`);
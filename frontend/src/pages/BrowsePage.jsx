@@ -4,16 +4,20 @@ import Navbar from '../components/Navbar';
 import Footer from '../components/Footer';
 import ImageGrid from '../components/ImageGrid';
 import ImageModal from '../components/ImageModal';
+import LoadMoreButton from '../components/LoadMoreButton';
 
 function BrowsePage() {
   const [images, setImages] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [selectedImage, setSelectedImage] = useState(null);
 
   useEffect(() => {
     imagesAPI.getAll()
       .then(res => {
         setImages(res.data);
+        setNextCursor(res.nextCursor);
         setLoading(false);
       })
       .catch(err => {
@@ -22,6 +26,20 @@ function BrowsePage() {
       });
   }, []);
 
+  const loadMore = () => {
+    setLoadingMore(true);
+    imagesAPI.getAll({ cursor: nextCursor })
+      .then(res => {
+        setImages(prev => [...prev, ...res.data]);
+        setNextCursor(res.nextCursor);
+        setLoadingMore(false);
+      })
+      .catch(err => {
+        console.error(err);
+        setLoadingMore(false);
+      });
+  };
+
   return (
     <div className="min-h-screen flex flex-col">
       <Navbar />
@@ -43,9 +61,10 @@ function BrowsePage() {
           ) : (
             <>
               <p className="text-sm text-gray-500 mb-8">
-                {images.length} {images.length === 1 ? 'image' : 'images'}
+                {images.length}{nextCursor ? '+' : ''} {images.length === 1 && !nextCursor ? 'image' : 'images'}
               </p>
               <ImageGrid images={images} onImageClick={setSelectedImage} />
+              {nextCursor && <LoadMoreButton onClick={loadMore} loading={loadingMore} />}
             </>
           )}
         </div>
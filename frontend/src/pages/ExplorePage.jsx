@@ -3,15 +3,19 @@ import { photographersAPI } from '../services/api';
 import Navbar from '../components/Navbar';
 import Footer from '../components/Footer';
 import PhotographerCard from '../components/PhotographerCard';
+import LoadMoreButton from '../components/LoadMoreButton';
 
 function ExplorePage() {
   const [photographers, setPhotographers] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     photographersAPI.getAll()
       .then(res => {
         setPhotographers(res.data);
+        setNextCursor(res.nextCursor);
         setLoading(false);
       })
       .catch(err => {
@@ -20,6 +24,20 @@ function ExplorePage() {
       });
   }, []);
 
+  const loadMore = () => {
+    setLoadingMore(true);
+    photographersAPI.getAll({ cursor: nextCursor })
+      .then(res => {
+        setPhotographers(prev => [...prev, ...res.data]);
+        setNextCursor(res.nextCursor);
+        setLoadingMore(false);
+      })
+      .catch(err => {
+        console.error(err);
+        setLoadingMore(false);
+      });
+  };
+
   if (loading) {
     return (
       <div className="min-h-screen flex flex-col">
@@ -49,6 +67,8 @@ function ExplorePage() {
               <PhotographerCard key={photographer.username} photographer={photographer} />
             ))}
           </div>
+
+          {nextCursor && <LoadMoreButton onClick={loadMore} loading={loadingMore} />}
         </div>
       </main>
       <Footer />
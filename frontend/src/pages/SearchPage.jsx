@@ -5,12 +5,15 @@ import Navbar from '../components/Navbar';
 import Footer from '../components/Footer';
 import ImageGrid from '../components/ImageGrid';
 import ImageModal from '../components/ImageModal';
+import LoadMoreButton from '../components/LoadMoreButton';
 
 function SearchPage() {
   const [searchParams] = useSearchParams();
   const query = searchParams.get('q') || '';
   const [images, setImages] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [selectedImage, setSelectedImage] = useState(null);
 
   useEffect(() => {
@@ -20,6 +23,7 @@ function SearchPage() {
     imagesAPI.search(query)
       .then(res => {
         setImages(res.data);
+        setNextCursor(res.nextCursor);
         setLoading(false);
       })
       .catch(err => {
@@ -28,6 +32,20 @@ function SearchPage() {
       });
   }, [query]);
 
+  const loadMore = () => {
+    setLoadingMore(true);
+    imagesAPI.search(query, { cursor: nextCursor })
+      .then(res => {
+        setImages(prev => [...prev, ...res.data]);
+        setNextCursor(res.nextCursor);
+        setLoadingMore(false);
+      })
+      .catch(err => {
+        console.error(err);
+        setLoadingMore(false);
+      });
+  };
+
   return (
     <div className="min-h-screen flex flex-col">
       <Navbar />
@@ -49,9 +67,10 @@ function SearchPage() {
           ) : (
             <>
               <p className="text-sm text-gray-500 mb-8">
-                {images.length} {images.length === 1 ? 'image' : 'images'} found
+                {images.length}{nextCursor ? '+' : ''} {images.length === 1 && !nextCursor ? 'image' : 'images'} found
               </p>
               <ImageGrid images={images} onImageClick={setSelectedImage} />
+              {nextCursor && <LoadMoreButton onClick={loadMore} loading={loadingMore} />}
             </>
           )}
         </div>
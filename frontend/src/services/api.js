@@ -14,6 +14,24 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+// List endpoints are cursor-paginated; the next cursor comes back in a header.
+// Pass nextCursor back as `cursor` to load the following page.
+const getPage = async (url, params = {}) => {
+  const response = await api.get(url, { params });
+  return { data: response.data, nextCursor: response.headers['x-next-cursor'] || null };
+};
+
+const getAllPages = async (url, params = {}) => {
+  const items = [];
+  let cursor = null;
+  do {
+    const response = await api.get(url, { params: cursor ? { ...params, cursor } : params });
+    items.push(...response.data);
+    cursor = response.headers['x-next-cursor'];
+  } while (cursor);
+  return { data: items };
+};
+
 export const authAPI = {
   login: (username, password) =>
     api.post(
@@ -26,7 +44,7 @@ export const authAPI = {
 };
 
 export const photographersAPI = {
-  getAll: () => api.get('/admins'),
+  getAll: ({ cursor, limit } = {}) => getPage('/admins', { cursor, limit }),
   getByUsername: (username) => api.get(`/admins?username=${username}`),
   update: (formData) => api.patch('/admins', formData, {
     headers: { 'Content-Type': 'multipart/form-data' }
@@ -34,8 +52,8 @@ export const photographersAPI = {
 };
 
 export const projectsAPI = {
-  getAll: () => api.get('/projects'),
-  getByUsername: (username) => api.get(`/${username}/projects`),
+  getAll: ({ cursor, limit } = {}) => getPage('/projects', { cursor, limit }),
+  getByUsername: (username) => getAllPages(`/${username}/projects`),
   getById: (id) => api.get(`/projects/${id}`),
   create: (data) => api.post('/projects', data),
   update: (id, data) => api.patch(`/projects/${id}`, data),
@@ -43,11 +61,13 @@ export const projectsAPI = {
 };
 
 export const imagesAPI = {
-  getAll: () => api.get('/images'),
+  getAll: ({ cursor, limit } = {}) => getPage('/images', { cursor, limit }),
   getById: (id) => api.get(`/images/${id}`),
-  getByProjectId: (projectId) => api.get(`/images?project_id=${projectId}`),
+  getByProjectId: (projectId) => getAllPages('/images', { project_id: projectId }),
+  getPageByProjectId: (projectId, { cursor, limit } = {}) =>
+    getPage('/images', { project_id: projectId, cursor, limit }),
   getSimilar: (id, limit = 3) => api.get(`/images/${id}/similar?limit=${limit}`),
-  search: (query) => api.get(`/images/search?q=${encodeURIComponent(query)}`),
+  search: (query, { cursor, limit } = {}) => getPage('/images/search', { q: query, cursor, limit }),
   generatePreview: (formData) => api.post('/images/ai-preview', formData),
   upload: (projectId, formData) => api.post(`/images/${projectId}`, formData),
   update: (id, data) => api.patch(`/images/${id}`, data),
@@ -1,2 +1,13 @@
-// Helper functions will go here
-export default {};
+export const API_ORIGIN = 'http://127.0.0.1:8000';
+
+// Builds a srcset from the resized copies the backend stores for each upload.
+export const getImageSrcSet = (image, format = 'webp') => {
+  const derivatives = image?.metadata?.derivatives || [];
+  return derivatives
+    .filter((d) => d.format === format)
+    .sort((a, b) => a.width - b.width)
+    .map((d) => `${API_ORIGIN}${d.path} ${d.width}w`)
+    .join(', ');
+};
+
+export default { getImageSrcSet };